@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from app.api import ingest, chat, documents
+from app.api import auth, ingest, chat, documents
 
 api_router = APIRouter()
 
+api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(ingest.router, prefix="/ingest", tags=["ingestion"])
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header
+
+from app.api.dependencies import (
+    DEFAULT_USER_EMAIL,
+    _resolve_user_id,
+    create_user_token,
+)
+
+router = APIRouter()
+
+
+@router.post("/token")
+async def issue_token(
+    x_user_email: Optional[str] = Header(None, alias="X-User-Email"),
+):
+    """Exchange an email for a signed user token.
+
+    Clients send the token back in X-User-Token, letting every
+    subsequent request skip the user lookup entirely.
+    """
+    email = x_user_email or DEFAULT_USER_EMAIL
+    user_id = await _resolve_user_id(email)
+    return {"user_id": str(user_id), "token": create_user_token(user_id)}
@@ -1,22 +1,133 @@
-import json
-from typing import Optional
+import asyncio
+from collections import OrderedDict, deque
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from uuid6 import uuid7
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy import select
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.db import get_db
+from app.db import get_db, AsyncSessionLocal
 from app.models.models import Conversation, Message
-from app.models.schemas import ChatRequest, ChatResponse, Citation, MessageResponse, ConversationResponse
+from app.models.schemas import (
+    ChatRequest,
+    ChatResponse,
+    Citation,
+    MessageResponse,
+    ConversationResponse,
+    ConversationSummaryResponse,
+)
 from app.services.retrieval import RetrievalService
 from app.services.llm import llm_service
+from app.services.response_cache import response_cache
 from app.api.dependencies import get_current_user_id
 
 router = APIRouter()
 
+# build_cacheable_messages trims the prompt to the last 6 messages
+# (3 exchanges), so that's all we ever load or cache
+CONVERSATION_HISTORY_LIMIT = 6
+
+# Rolling per-conversation history dicts so follow-up turns skip the
+# message query entirely. Keyed (user_id, conversation_id): a hit means
+# the ownership check passed when the entry was created, and ownership
+# never changes. Appended after each commit, dropped on delete; bounded
+# LRU like the response cache.
+_HISTORY_CACHE_MAX = 1024
+_history_cache: OrderedDict = OrderedDict()
+
+
+def _history_cache_get(user_id: UUID, conversation_id: UUID) -> Optional[deque]:
+    key = (user_id, conversation_id)
+    entry = _history_cache.get(key)
+    if entry is not None:
+        _history_cache.move_to_end(key)
+    return entry
+
+
+def _history_cache_put(user_id: UUID, conversation_id: UUID, history: deque):
+    _history_cache[(user_id, conversation_id)] = history
+    if len(_history_cache) > _HISTORY_CACHE_MAX:
+        _history_cache.popitem(last=False)
+
+
+def _history_cache_append(
+    user_id: UUID, conversation_id: UUID, user_content: str, assistant_content: str
+):
+    """Roll a committed exchange into the cached history, if present."""
+    entry = _history_cache.get((user_id, conversation_id))
+    if entry is not None:
+        entry.append({"role": "user", "content": user_content})
+        entry.append({"role": "assistant", "content": assistant_content})
+
+# SSE framing for the per-token event: only the token string varies, so
+# the dict wrapper is pre-encoded as bytes and each frame is one
+# orjson.dumps plus two concatenations
+_TOKEN_PRE = b'data: {"type": "token", "token": '
+_TOKEN_POST = b'}\n\n'
+
+
+async def _load_conversation_history(
+    db: AsyncSession, conversation_id: UUID, user_id: UUID
+) -> list[dict]:
+    """Load recent history as role/content dicts for an owned conversation.
+
+    Projects only the two columns the LLM prompt needs instead of
+    hydrating full Message rows (citations JSON, timestamps, identity
+    map) via selectinload. Raises 404 if the conversation isn't the
+    user's. Served from the rolling history cache when this
+    conversation has been seen before.
+    """
+    cached = _history_cache_get(user_id, conversation_id)
+    if cached is not None:
+        return list(cached)
+
+    conv_result = await db.execute(
+        select(Conversation.id).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == user_id
+        )
+    )
+    if conv_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    msg_result = await db.execute(
+        select(Message.role, Message.content)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.created_at.desc())
+        .limit(CONVERSATION_HISTORY_LIMIT)
+    )
+    rows = msg_result.all()
+    history = deque(
+        ({"role": role, "content": content} for role, content in reversed(rows)),
+        maxlen=CONVERSATION_HISTORY_LIMIT,
+    )
+    _history_cache_put(user_id, conversation_id, history)
+    return list(history)
+
+
+async def _retrieve_for_query(
+    user_id: UUID, query: str, timezone: str
+) -> Tuple[list, List[float]]:
+    """Run retrieval on a dedicated session.
+
+    An AsyncSession can't run two statements at once, so retrieval gets
+    its own session and can overlap the history load / conversation
+    insert happening on the request's session.
+    """
+    async with AsyncSessionLocal() as session:
+        retrieval_service = RetrievalService(session)
+        return await retrieval_service.retrieve_with_embedding(
+            user_id=user_id,
+            query=query,
+            timezone=timezone,
+            top_k=5,
+        )
+
 
 @router.post("", response_model=ChatResponse)
 async def chat(
@@ -31,76 +142,101 @@ async def chat(
     - **conversation_id**: Optional ID to continue an existing conversation
     - **timezone**: User's timezone for temporal queries (default: UTC)
     """
-    # Get or create conversation
-    conversation = None
-    conversation_history = []
+    # Check the response cache before doing any retrieval/LLM work.
+    # Scoped to request.conversation_id (None for a new conversation —
+    # no history yet) so a history-dependent answer is never replayed
+    # in a different conversation.
+    cached = response_cache.lookup_exact(
+        user_id, request.conversation_id, request.message
+    )
 
-    if request.conversation_id:
-        result = await db.execute(
-            select(Conversation)
-            .where(
-                Conversation.id == request.conversation_id,
-                Conversation.user_id == user_id
-            )
-            .options(selectinload(Conversation.messages))
+    # Kick off retrieval on its own session so it overlaps the
+    # conversation lookup/insert below
+    retrieval_task = None
+    if not cached:
+        retrieval_task = asyncio.create_task(
+            _retrieve_for_query(user_id, request.message, request.timezone)
         )
-        conversation = result.scalar_one_or_none()
 
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
-
-        # Build conversation history
-        for msg in conversation.messages:
-            conversation_history.append({
-                "role": msg.role,
-                "content": msg.content
-            })
+    # Get or create conversation
+    conversation_history = []
+    conversation_id = request.conversation_id
 
-    if not conversation:
-        conversation = Conversation(
-            user_id=user_id,
-            title=request.message[:100] if len(request.message) > 100 else request.message,
+    try:
+        if conversation_id:
+            conversation_history = await _load_conversation_history(
+                db, conversation_id, user_id
+            )
+        else:
+            # Assign the id client-side so the Message rows below can
+            # reference it without a flush round trip; the INSERT goes
+            # out with the single commit at the end
+            conversation_id = uuid7()
+            db.add(
+                Conversation(
+                    id=conversation_id,
+                    user_id=user_id,
+                    title=request.message[:100] if len(request.message) > 100 else request.message,
+                )
+            )
+    except Exception:
+        if retrieval_task:
+            retrieval_task.cancel()
+        raise
+
+    if cached:
+        answer, citations = cached
+    else:
+        chunks, query_embedding = await retrieval_task
+
+        # Semantic cache tier: reuse answers to near-identical questions
+        cached = response_cache.lookup_semantic(
+            user_id, request.conversation_id, query_embedding
         )
-        db.add(conversation)
-        await db.flush()
-
-    # Retrieve relevant context
-    retrieval_service = RetrievalService(db)
-    chunks = await retrieval_service.retrieve(
-        user_id=user_id,
-        query=request.message,
-        timezone=request.timezone,
-        top_k=5,
-    )
-
-    # Generate answer
-    answer, citations = await llm_service.generate_answer(
-        query=request.message,
-        chunks=chunks,
-        conversation_history=conversation_history,
-    )
+        if cached:
+            answer, citations = cached
+        else:
+            # Generate answer
+            answer, citations = await llm_service.generate_answer(
+                query=request.message,
+                chunks=chunks,
+                conversation_history=conversation_history,
+            )
+            response_cache.put(
+                user_id, request.conversation_id, request.message,
+                query_embedding, answer, citations,
+            )
 
     # Save user message
     user_message = Message(
-        conversation_id=conversation.id,
+        conversation_id=conversation_id,
         role="user",
         content=request.message,
     )
     db.add(user_message)
 
-    # Save assistant message (use mode='json' to serialize UUIDs as strings)
+    # Save assistant message (raw UUIDs are fine — the engine's orjson
+    # serializer stringifies them in the single encode to JSONB)
     assistant_message = Message(
-        conversation_id=conversation.id,
+        conversation_id=conversation_id,
         role="assistant",
         content=answer,
-        citations=[c.model_dump(mode='json') for c in citations] if citations else None,
+        citations=[c.model_dump() for c in citations] if citations else None,
     )
     db.add(assistant_message)
 
     await db.commit()
 
+    # A new conversation's full history is exactly this exchange;
+    # existing ones only roll forward if their entry is still cached
+    if request.conversation_id is None:
+        _history_cache_put(
+            user_id, conversation_id, deque(maxlen=CONVERSATION_HISTORY_LIMIT)
+        )
+    _history_cache_append(user_id, conversation_id, request.message, answer)
+
     return ChatResponse(
-        conversation_id=conversation.id,
+        conversation_id=conversation_id,
         message_id=assistant_message.id,
         content=answer,
         citations=citations,
@@ -118,94 +254,140 @@ async def chat_stream(
 
     Returns Server-Sent Events (SSE) with the response.
     """
-    # Get or create conversation
-    conversation = None
-    conversation_history = []
+    # Check the response cache before doing any retrieval/LLM work
+    # (conversation-scoped — see chat() above)
+    cached = response_cache.lookup_exact(
+        user_id, request.conversation_id, request.message
+    )
 
-    if request.conversation_id:
-        result = await db.execute(
-            select(Conversation)
-            .where(
-                Conversation.id == request.conversation_id,
-                Conversation.user_id == user_id
-            )
-            .options(selectinload(Conversation.messages))
+    # Kick off retrieval on its own session so it overlaps the
+    # conversation lookup/insert below
+    retrieval_task = None
+    if not cached:
+        retrieval_task = asyncio.create_task(
+            _retrieve_for_query(user_id, request.message, request.timezone)
         )
-        conversation = result.scalar_one_or_none()
-
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
 
-        for msg in conversation.messages:
-            conversation_history.append({
-                "role": msg.role,
-                "content": msg.content
-            })
+    # Get or create conversation
+    conversation_history = []
+    conversation_id = request.conversation_id
 
-    if not conversation:
-        conversation = Conversation(
-            user_id=user_id,
-            title=request.message[:100] if len(request.message) > 100 else request.message,
+    try:
+        if conversation_id:
+            conversation_history = await _load_conversation_history(
+                db, conversation_id, user_id
+            )
+        else:
+            # Assign the id client-side so the Message rows below can
+            # reference it without a flush round trip; the INSERT goes
+            # out with the single commit at the end
+            conversation_id = uuid7()
+            db.add(
+                Conversation(
+                    id=conversation_id,
+                    user_id=user_id,
+                    title=request.message[:100] if len(request.message) > 100 else request.message,
+                )
+            )
+    except Exception:
+        if retrieval_task:
+            retrieval_task.cancel()
+        raise
+
+    chunks = []
+    query_embedding = None
+    if retrieval_task:
+        chunks, query_embedding = await retrieval_task
+
+        # Semantic cache tier: reuse answers to near-identical questions
+        cached = response_cache.lookup_semantic(
+            user_id, request.conversation_id, query_embedding
         )
-        db.add(conversation)
-        await db.flush()
-
-    # Retrieve relevant context
-    retrieval_service = RetrievalService(db)
-    chunks = await retrieval_service.retrieve(
-        user_id=user_id,
-        query=request.message,
-        timezone=request.timezone,
-        top_k=5,
-    )
 
-    # Get citations
-    citations = llm_service.get_citations_for_chunks(chunks)
+    if cached:
+        cached_answer, citations = cached
+    else:
+        cached_answer = None
+        # Get citations
+        citations = llm_service.get_citations_for_chunks(chunks)
 
     # Save user message and commit before streaming
     # (StreamingResponse runs after endpoint returns, so we need to persist first)
     user_message = Message(
-        conversation_id=conversation.id,
+        conversation_id=conversation_id,
         role="user",
         content=request.message,
     )
     db.add(user_message)
     await db.commit()
 
-    # Store IDs for use in generator (session objects may become detached)
-    conversation_id = conversation.id
+    # Dumped once, reused for both the SSE citations frame and the
+    # stored assistant message; orjson stringifies the UUIDs/datetimes
+    # in both paths so mode='json' is unnecessary
+    citations_data = [c.model_dump() for c in citations]
+
+    # One-shot frames, built outside the generator
+    start_frame = (
+        b'data: '
+        + orjson.dumps({"type": "start", "conversation_id": conversation_id})
+        + b'\n\n'
+    )
+    citations_frame = (
+        b'data: '
+        + orjson.dumps({"type": "citations", "citations": citations_data})
+        + b'\n\n'
+    )
 
     async def generate():
         full_response = ""
 
         # Send initial metadata
-        yield f"data: {json.dumps({'type': 'start', 'conversation_id': str(conversation_id)})}\n\n"
+        yield start_frame
 
         # Send citations first
-        citations_data = [c.model_dump(mode='json') for c in citations]
-        yield f"data: {json.dumps({'type': 'citations', 'citations': citations_data})}\n\n"
-
-        # Stream the response
-        async for token in llm_service.generate_answer_stream(
-            query=request.message,
-            chunks=chunks,
-            conversation_history=conversation_history,
-        ):
-            full_response += token
-            yield f"data: {json.dumps({'type': 'token', 'token': token})}\n\n"
-
-        # Save assistant message (use mode='json' to serialize UUIDs as strings)
+        yield citations_frame
+
+        # Stream the response (cache hits replay the answer as one event)
+        if cached_answer is not None:
+            full_response = cached_answer
+            yield _TOKEN_PRE + orjson.dumps(cached_answer) + _TOKEN_POST
+        else:
+            async for token in llm_service.generate_answer_stream(
+                query=request.message,
+                chunks=chunks,
+                conversation_history=conversation_history,
+            ):
+                full_response += token
+                yield _TOKEN_PRE + orjson.dumps(token) + _TOKEN_POST
+            response_cache.put(
+                user_id, request.conversation_id, request.message,
+                query_embedding, full_response, citations,
+            )
+
+        # Save assistant message (UUIDs already stringified above)
         assistant_message = Message(
             conversation_id=conversation_id,
             role="assistant",
             content=full_response,
-            citations=[c.model_dump(mode='json') for c in citations] if citations else None,
+            citations=citations_data or None,
         )
         db.add(assistant_message)
         await db.commit()
 
+        if request.conversation_id is None:
+            _history_cache_put(
+                user_id, conversation_id, deque(maxlen=CONVERSATION_HISTORY_LIMIT)
+            )
+        _history_cache_append(
+            user_id, conversation_id, request.message, full_response
+        )
+
         # Send completion
-        yield f"data: {json.dumps({'type': 'done', 'message_id': str(assistant_message.id)})}\n\n"
+        yield (
+            b'data: '
+            + orjson.dumps({"type": "done", "message_id": assistant_message.id})
+            + b'\n\n'
+        )
 
     return StreamingResponse(
         generate(),
@@ -218,44 +400,86 @@ async def chat_stream(
     )
 
 
-@router.get("/conversations", response_model=list[ConversationResponse])
+@router.get("/conversations", response_model=list[ConversationSummaryResponse])
 async def list_conversations(
     db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user_id),
 ):
     """List all conversations for the current user."""
+    # Correlated count subquery — one query with N rows rather than
+    # loading messages (or issuing per-conversation counts) for the list
+    message_count = (
+        select(func.count())
+        .where(Message.conversation_id == Conversation.id)
+        .scalar_subquery()
+        .label("message_count")
+    )
     result = await db.execute(
-        select(Conversation)
+        select(
+            Conversation.id,
+            Conversation.title,
+            Conversation.created_at,
+            Conversation.updated_at,
+            message_count,
+        )
         .where(Conversation.user_id == user_id)
         .order_by(Conversation.updated_at.desc())
-        .options(selectinload(Conversation.messages))
     )
-    conversations = result.scalars().all()
 
-    return [ConversationResponse.model_validate(conv) for conv in conversations]
+    return [ConversationSummaryResponse.model_validate(row) for row in result.all()]
 
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
     conversation_id: UUID,
+    include_messages: bool = Query(True),
     db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user_id),
 ):
-    """Get a specific conversation with all messages."""
+    """Get a specific conversation, optionally with all its messages."""
+    # Two column projections instead of selectinload — no ORM Message
+    # objects are materialized just to be converted to Pydantic
     result = await db.execute(
-        select(Conversation)
-        .where(
+        select(Conversation.id, Conversation.title, Conversation.created_at).where(
             Conversation.id == conversation_id,
             Conversation.user_id == user_id
         )
-        .options(selectinload(Conversation.messages))
     )
-    conversation = result.scalar_one_or_none()
+    conv = result.one_or_none()
 
-    if not conversation:
+    if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    return ConversationResponse.model_validate(conversation)
+    messages = []
+    if include_messages:
+        msg_result = await db.execute(
+            select(
+                Message.id,
+                Message.role,
+                Message.content,
+                Message.citations,
+                Message.created_at,
+            )
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.created_at)
+        )
+        messages = [
+            MessageResponse.model_construct(
+                id=row.id,
+                role=row.role,
+                content=row.content,
+                citations=row.citations,
+                created_at=row.created_at,
+            )
+            for row in msg_result
+        ]
+
+    return ConversationResponse.model_construct(
+        id=conv.id,
+        title=conv.title,
+        created_at=conv.created_at,
+        messages=messages,
+    )
 
 
 @router.delete("/conversations/{conversation_id}")
@@ -265,18 +489,22 @@ async def delete_conversation(
     user_id: UUID = Depends(get_current_user_id),
 ):
     """Delete a conversation and all its messages."""
+    # Single DELETE ... RETURNING — no entity load, and messages are
+    # removed by the DB-side ON DELETE CASCADE in one statement
     result = await db.execute(
-        select(Conversation).where(
+        delete(Conversation)
+        .where(
             Conversation.id == conversation_id,
             Conversation.user_id == user_id
         )
+        .returning(Conversation.id)
     )
-    conversation = result.scalar_one_or_none()
+    deleted = result.scalar_one_or_none()
 
-    if not conversation:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    await db.delete(conversation)
     await db.commit()
+    _history_cache.pop((user_id, conversation_id), None)
 
     return {"status": "deleted", "conversation_id": str(conversation_id)}
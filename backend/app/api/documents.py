@@ -4,7 +4,7 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select, func, delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only
 
 from app.db import get_db
 from app.models.models import Document, Chunk, SourceType
@@ -23,23 +23,52 @@ async def list_documents(
     user_id: UUID = Depends(get_current_user_id),
 ):
     """List all documents for the current user."""
-    # Build query
-    query = select(Document).where(Document.user_id == user_id)
+    # Build query — only the columns DocumentResponse exposes, skipping
+    # the potentially large content_text
+    query = (
+        select(Document)
+        .where(Document.user_id == user_id)
+        .options(
+            load_only(
+                Document.id,
+                Document.user_id,
+                Document.source_type,
+                Document.title,
+                Document.source_uri,
+                Document.original_filename,
+                Document.status,
+                Document.created_at,
+                Document.ingested_at,
+                Document.metadata_,
+            )
+        )
+    )
 
     if source_type:
         query = query.where(Document.source_type == source_type)
 
-    # Get total count
-    count_query = select(func.count()).select_from(
-        query.subquery()
+    # Fetch the page and the total count in one round trip via a window
+    # function instead of a separate SELECT count(*) over a subquery
+    query = (
+        query.add_columns(func.count().over().label("total"))
+        .order_by(Document.created_at.desc())
+        .limit(limit)
+        .offset(offset)
     )
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    # Get documents
-    query = query.order_by(Document.created_at.desc()).limit(limit).offset(offset)
-    result = await db.execute(query)
-    documents = result.scalars().all()
+    rows = (await db.execute(query)).all()
+    if rows:
+        total = rows[0].total
+    elif offset:
+        # The window count only rides along on returned rows — an
+        # offset past the last row yields an empty page, not an empty
+        # collection, so fall back to a plain count
+        count_query = select(func.count()).where(Document.user_id == user_id)
+        if source_type:
+            count_query = count_query.where(Document.source_type == source_type)
+        total = (await db.execute(count_query)).scalar_one()
+    else:
+        total = 0
+    documents = [row[0] for row in rows]
 
     return DocumentListResponse(
         documents=[DocumentResponse.model_validate(doc) for doc in documents],
@@ -87,11 +116,26 @@ async def get_document_chunks(
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Get chunks
+    # Get chunks — skip tsv/chunk_metadata columns the response never reads
     result = await db.execute(
         select(Chunk)
         .where(Chunk.document_id == document_id)
         .order_by(Chunk.chunk_index)
+        .options(
+            load_only(
+                Chunk.id,
+                Chunk.document_id,
+                Chunk.chunk_index,
+                Chunk.text,
+                Chunk.token_count,
+                Chunk.page_start,
+                Chunk.page_end,
+                Chunk.time_start,
+                Chunk.time_end,
+                Chunk.source_offset_ms_start,
+                Chunk.source_offset_ms_end,
+            )
+        )
     )
     chunks = result.scalars().all()
 
@@ -105,20 +149,21 @@ async def delete_document(
     user_id: UUID = Depends(get_current_user_id),
 ):
     """Delete a document and all its chunks."""
-    # Verify document exists and belongs to user
+    # Single DELETE ... RETURNING — chunks and embeddings go via the
+    # DB-side ON DELETE CASCADE instead of per-row ORM cascade deletes
     result = await db.execute(
-        select(Document).where(
+        delete(Document)
+        .where(
             Document.id == document_id,
             Document.user_id == user_id
         )
+        .returning(Document.id)
     )
-    doc = result.scalar_one_or_none()
+    deleted = result.scalar_one_or_none()
 
-    if not doc:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Delete document (cascades to chunks and embeddings)
-    await db.delete(doc)
     await db.commit()
 
     return {"status": "deleted", "document_id": str(document_id)}
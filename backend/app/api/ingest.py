@@ -1,3 +1,4 @@
+import hashlib
 import os
 import logging
 import tempfile
@@ -5,6 +6,8 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
+import aiofiles
+
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
 
 logger = logging.getLogger(__name__)
@@ -18,56 +21,79 @@ from app.models.schemas import (
     IngestionJobResponse,
     DocumentResponse,
 )
-from app.services.ingestion.pipeline import IngestionPipeline
+from app.services.ingestion.pipeline import pipeline, run_ingestion_job
 from app.api.dependencies import get_current_user_id
 
 router = APIRouter()
 
+# Uploads at or below this stay in memory instead of round-tripping
+# through a temp file on disk
+SMALL_UPLOAD_MAX = 2 * 1024 * 1024
+
 
-@router.post("/text", response_model=DocumentResponse)
+@router.post("/text", response_model=IngestionJobResponse, status_code=202)
 async def ingest_text(
     request: IngestTextRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user_id),
 ):
-    """Ingest plain text content."""
-    pipeline = IngestionPipeline(db)
+    """Queue plain text content for ingestion.
+
+    Returns 202 with the job; poll /ingest/jobs/{job_id} for progress.
+    """
+    title = request.title or (
+        request.text[:100].strip() + "..." if len(request.text) > 100
+        else request.text.strip()
+    )
 
     try:
-        doc = await pipeline.ingest_text(
+        job = await pipeline.create_job(
+            db,
             user_id=user_id,
-            text=request.text,
-            title=request.title,
+            source_type=SourceType.TEXT,
+            title=title,
+            content_text=request.text,
             created_at=request.created_at,
         )
-        return DocumentResponse.model_validate(doc)
     except Exception as e:
         logger.exception(f"Text ingestion failed: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+    background_tasks.add_task(run_ingestion_job, job.id)
+    return IngestionJobResponse.model_validate(job)
+
 
-@router.post("/url", response_model=DocumentResponse)
+@router.post("/url", response_model=IngestionJobResponse, status_code=202)
 async def ingest_url(
     request: IngestURLRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user_id),
 ):
-    """Ingest content from a URL."""
-    pipeline = IngestionPipeline(db)
+    """Queue a URL for ingestion.
 
+    Fetching and extraction happen in the background; poll the job.
+    """
     try:
-        doc = await pipeline.ingest_url(
+        job = await pipeline.create_job(
+            db,
             user_id=user_id,
-            url=request.url,
+            source_type=SourceType.WEB,
+            title=request.url,
+            source_uri=request.url,
         )
-        return DocumentResponse.model_validate(doc)
     except Exception as e:
         logger.exception(f"URL ingestion failed: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+    background_tasks.add_task(run_ingestion_job, job.id)
+    return IngestionJobResponse.model_validate(job)
+
 
-@router.post("/file", response_model=DocumentResponse)
+@router.post("/file", response_model=IngestionJobResponse, status_code=202)
 async def ingest_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     source_type: str = Form(...),
     created_at: Optional[str] = Form(None),
@@ -75,11 +101,13 @@ async def ingest_file(
     user_id: UUID = Depends(get_current_user_id),
 ):
     """
-    Ingest a file (audio, PDF, markdown, etc.).
+    Queue a file (audio, PDF, markdown, etc.) for ingestion.
 
     - **file**: The file to upload
     - **source_type**: Type of file (audio, pdf, markdown, text)
     - **created_at**: Optional creation timestamp (ISO format)
+
+    Returns 202 with the job; poll /ingest/jobs/{job_id} for progress.
     """
     from app.config import settings
 
@@ -111,37 +139,85 @@ async def ingest_file(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid created_at format. Use ISO format.")
 
-    # Read file content and validate size
-    content = await file.read()
     max_size_bytes = settings.max_file_size_mb * 1024 * 1024
-    if len(content) > max_size_bytes:
+
+    # Early-reject oversized uploads when the client declares a size
+    if file.size and file.size > max_size_bytes:
         raise HTTPException(
             status_code=400,
             detail=f"File size exceeds maximum allowed size of {settings.max_file_size_mb} MB"
         )
 
-    # Save uploaded file temporarily
+    # Hybrid buffering: read the first couple of MiB into memory; small
+    # text uploads (the common pasted-notes case) never touch disk, and
+    # anything bigger spills to a temp file streamed in 1 MiB chunks
+    hasher = hashlib.sha256()
+    head = bytearray()
+    eof = False
+    while len(head) <= SMALL_UPLOAD_MAX:
+        chunk = await file.read(1 << 20)
+        if not chunk:
+            eof = True
+            break
+        hasher.update(chunk)
+        head += chunk
+
+    if eof and source_type_enum == SourceType.TEXT:
+        # Whole file fits in memory — hand the decoded text straight to
+        # the pipeline, skipping the tempfile write/read/delete cycle
+        job = await pipeline.create_job(
+            db,
+            user_id=user_id,
+            source_type=source_type_enum,
+            title=file.filename or "uploaded_file",
+            original_filename=file.filename or "uploaded_file",
+            content_text=head.decode("utf-8", errors="replace"),
+            content_hash=hasher.hexdigest(),
+            created_at=created_at_dt,
+        )
+        background_tasks.add_task(run_ingestion_job, job.id)
+        return IngestionJobResponse.model_validate(job)
+
     with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-        tmp.write(content)
         tmp_path = tmp.name
 
     try:
-        pipeline = IngestionPipeline(db)
-        doc = await pipeline.ingest_file(
+        received = len(head)
+        async with aiofiles.open(tmp_path, "wb") as out:
+            await out.write(head)
+            while chunk := await file.read(1 << 20):
+                received += len(chunk)
+                if received > max_size_bytes:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File size exceeds maximum allowed size of {settings.max_file_size_mb} MB"
+                    )
+                hasher.update(chunk)
+                await out.write(chunk)
+        content_hash = hasher.hexdigest()
+
+        job = await pipeline.create_job(
+            db,
             user_id=user_id,
-            file_path=tmp_path,
-            original_filename=file.filename or "uploaded_file",
             source_type=source_type_enum,
+            title=file.filename or "uploaded_file",
+            original_filename=file.filename or "uploaded_file",
+            content_hash=content_hash,
             created_at=created_at_dt,
         )
-        return DocumentResponse.model_validate(doc)
+    except HTTPException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     except Exception as e:
         logger.exception(f"File ingestion failed: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
-    finally:
-        # Clean up temp file
         if os.path.exists(tmp_path):
             os.remove(tmp_path)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    # The background task owns the temp file from here and removes it
+    background_tasks.add_task(run_ingestion_job, job.id, tmp_path, cleanup_file=True)
+    return IngestionJobResponse.model_validate(job)
 
 
 @router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
-from pydantic import field_validator
+from pydantic import field_validator, model_validator
 
 load_dotenv()
 
@@ -18,6 +18,17 @@ class Settings(BaseSettings):
             return v.replace("postgresql://", "postgresql+asyncpg://", 1)
         return v
 
+    # Whether the database is a managed provider that requires SSL.
+    # Computed once here so the engine factory doesn't re-scan the URL.
+    is_managed_db: bool = False
+
+    @model_validator(mode="after")
+    def _detect_managed_db(self) -> "Settings":
+        self.is_managed_db = (
+            "supabase" in self.database_url or "neon" in self.database_url
+        )
+        return self
+
     # API Keys
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     google_api_key: str = os.getenv("GOOGLE_API_KEY", "")
@@ -26,6 +37,9 @@ class Settings(BaseSettings):
     app_name: str = "SecondBrain"
     debug: bool = os.getenv("DEBUG", "false").lower() == "true"
 
+    # Secret for signing X-User-Token values (set a real one in prod)
+    auth_token_secret: str = os.getenv("AUTH_TOKEN_SECRET", "dev-secret-change-me")
+
     # File storage
     upload_dir: str = os.getenv("UPLOAD_DIR", "./uploads")
     max_file_size_mb: int = 20
@@ -34,6 +48,15 @@ class Settings(BaseSettings):
     embedding_model: str = "text-embedding-3-small"
     embedding_dimensions: int = 1536
 
+    # HNSW index tuning. Defaults target the 100K-1M vector range:
+    # higher graph connectivity (m) and build-time beam width
+    # (ef_construction) than pgvector's 16/64 defaults trade slower
+    # index builds for better recall/QPS; ef_search is the query-time
+    # beam width set per retrieval transaction.
+    hnsw_m: int = 24
+    hnsw_ef_construction: int = 128
+    hnsw_ef_search: int = 100
+
     # LLM settings
     llm_model: str = "gpt-4o-mini"
     max_context_tokens: int = 8000
@@ -42,6 +65,9 @@ class Settings(BaseSettings):
     chunk_size: int = 500
     chunk_overlap: int = 50
 
+    # Worker processes for parallel PDF page extraction (0 = one per CPU)
+    ingestion_parallel_workers: int = int(os.getenv("INGESTION_PARALLEL_THREADS", "0"))
+
     class Config:
         env_file = ".env"
 
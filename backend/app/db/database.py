@@ -1,20 +1,37 @@
+import orjson
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.config import settings
 
-# Fix database URL for asyncpg
-database_url = settings.database_url
-if database_url.startswith("postgresql://"):
-    database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+# asyncpg connection options: reuse server-side prepared statements so
+# repeated queries skip the parse step, and disable the Postgres JIT,
+# which only hurts short OLTP queries.
+connect_args = {
+    "statement_cache_size": 1024,
+    "prepared_statement_cache_size": 1024,
+    "server_settings": {"jit": "off"},
+}
+if settings.is_managed_db:
+    # SSL for managed Postgres providers
+    connect_args["ssl"] = "require"
 
-# Create async engine with SSL for Supabase
+# Create async engine with a pool sized for FastAPI concurrency.
+# The postgresql:// -> postgresql+asyncpg:// rewrite happens once in the
+# Settings validator, not here.
 engine = create_async_engine(
-    database_url,
+    settings.database_url,
     echo=settings.debug,
     pool_pre_ping=True,
-    connect_args={
-        "ssl": "require",
-    } if "supabase" in database_url or "neon" in database_url else {},
+    pool_size=20,
+    max_overflow=40,
+    pool_recycle=1800,
+    connect_args=connect_args,
+    # orjson encodes JSON columns at C speed and handles UUID/datetime
+    # natively, so callers can pass model_dump() output without a prior
+    # mode='json' stringification pass
+    json_serializer=lambda v: orjson.dumps(v).decode(),
+    json_deserializer=orjson.loads,
 )
 
 # Create async session factory
@@ -38,10 +55,23 @@ async def get_db():
             await session.close()
 
 
+# Number of hash partitions for the per-tenant chunk tables
+CHUNK_PARTITIONS = 16
+
+
 async def init_db():
     """Initialize database tables and extensions."""
     async with engine.begin() as conn:
         # Enable pgvector extension
-        await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
         # Create all tables
         await conn.run_sync(Base.metadata.create_all)
+        # chunks/chunk_embeddings are PARTITION BY HASH (user_id);
+        # create_all only emits the parents, so attach the children here
+        for table in ("chunks", "chunk_embeddings"):
+            for i in range(CHUNK_PARTITIONS):
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table}_p{i} "
+                    f"PARTITION OF {table} "
+                    f"FOR VALUES WITH (MODULUS {CHUNK_PARTITIONS}, REMAINDER {i})"
+                ))
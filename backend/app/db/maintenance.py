@@ -0,0 +1,27 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+
+async def reindex_embeddings_bulk(db: AsyncSession):
+    """Drop and rebuild the HNSW index around a bulk embedding load.
+
+    With the index in place every inserted embedding pays a graph
+    insertion, which dominates large backfills; dropping it first and
+    rebuilding once afterwards with parallel maintenance workers and a
+    generous maintenance_work_mem is roughly an order of magnitude
+    faster. Intended for migrations and admin reingest flows, not the
+    request path. The caller owns the transaction.
+    """
+    await db.execute(text("DROP INDEX IF EXISTS idx_chunk_embeddings_vector"))
+    # SET LOCAL: plain SET is session-scoped and would leak the 2GB
+    # maintenance_work_mem onto the pooled connection after commit
+    await db.execute(text("SET LOCAL max_parallel_maintenance_workers = 7"))
+    await db.execute(text("SET LOCAL maintenance_work_mem = '2GB'"))
+    await db.execute(text(
+        "CREATE INDEX idx_chunk_embeddings_vector "
+        "ON chunk_embeddings USING hnsw (embedding halfvec_cosine_ops) "
+        f"WITH (m = {int(settings.hnsw_m)}, "
+        f"ef_construction = {int(settings.hnsw_ef_construction)})"
+    ))
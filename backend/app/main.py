@@ -1,27 +1,34 @@
+import hashlib
 import logging
+import ssl
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy import text
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.config import settings
-from app.db import engine, Base
+from app.db import init_db
 from app.api import api_router
+from app.services.ingestion.web import web_processor
 
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
-    async with engine.begin() as conn:
-        # Enable pgvector extension
-        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-        # Create all tables
-        await conn.run_sync(Base.metadata.create_all)
+    """Initialize database on startup, release pooled clients on shutdown."""
+    # Content hashing leans on OpenSSL's SHA-256 (SHA-NI on modern
+    # x86 / SHA2 extensions on ARM); surface the backing build so a
+    # slow scalar fallback is visible in the logs
+    digest = hashlib.sha256(usedforsecurity=False)
+    logger.info("sha256 backend: %s via %s", type(digest).__name__, ssl.OPENSSL_VERSION)
+
+    # init_db also attaches the chunk table partitions, which the plain
+    # create_all here used to miss
+    await init_db()
     yield
+    await web_processor.aclose()
 
 
 app = FastAPI(
@@ -29,6 +36,9 @@ app = FastAPI(
     description="A personal AI companion that ingests, understands, and reasons about your information.",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson encodes response bodies at C speed; matters most for the
+    # list endpoints returning many UUID/datetime-heavy rows
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -9,20 +9,52 @@ from sqlalchemy import (
     Integer,
     DateTime,
     ForeignKey,
-    JSON,
+    ForeignKeyConstraint,
     Index,
     Enum as SQLEnum,
     func,
+    text as sql_text,
     Computed,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
-from pgvector.sqlalchemy import Vector
+# JSONB over JSON: binary storage skips the reparse on every read and
+# supports containment operators / GIN indexing
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
+from pgvector.sqlalchemy import HALFVEC
+# UUIDv7 primary keys: the millisecond-timestamp prefix keeps inserts
+# appending to the right edge of the PK btree instead of splattering
+# random pages (less WAL, warmer cache), and id order tracks insert time
+from uuid6 import uuid7
 
 from app.db.database import Base
 from app.config import settings
 
 
+# Postgres text-search configs a chunk's language column may hold; the
+# ingestion pipeline validates detected languages against this set and
+# stores anything else as 'simple'. Enumerated here because the tsv
+# generation expression must branch over them literally (see Chunk.tsv).
+FTS_CONFIGS = (
+    "english", "spanish", "french", "german", "italian", "portuguese",
+    "dutch", "russian", "swedish", "norwegian", "danish", "finnish",
+    "hungarian", "romanian", "turkish",
+)
+
+# Generated columns require an IMMUTABLE expression, and a
+# language::regconfig cast goes through regconfig_in, which is only
+# STABLE — CREATE TABLE rejects it. Branching over literal regconfig
+# constants keeps the expression immutable while preserving the
+# per-language lexer.
+_TSV_EXPR = (
+    "CASE language "
+    + " ".join(
+        f"WHEN '{cfg}' THEN to_tsvector('{cfg}'::regconfig, text)"
+        for cfg in FTS_CONFIGS
+    )
+    + " ELSE to_tsvector('simple'::regconfig, text) END"
+)
+
+
 class SourceType(str, Enum):
     AUDIO = "audio"
     PDF = "pdf"
@@ -51,7 +83,7 @@ class User(Base):
     __tablename__ = "users"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
@@ -67,7 +99,7 @@ class Document(Base):
     __tablename__ = "documents"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
@@ -81,6 +113,12 @@ class Document(Base):
     content_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
+    # Text-search configuration used for this document's chunks
+    # ('english', 'spanish', ..., or 'simple' for unsupported languages)
+    language: Mapped[str] = mapped_column(
+        String(32), nullable=False, default="english", server_default=sql_text("'english'")
+    )
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
@@ -93,15 +131,18 @@ class Document(Base):
     )
 
     # Metadata
-    metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSON, nullable=True)
+    metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSONB, nullable=True)
     status: Mapped[JobStatus] = mapped_column(
         SQLEnum(JobStatus), default=JobStatus.QUEUED
     )
 
     # Relationships
     user: Mapped["User"] = relationship(back_populates="documents")
+    # lazy="raise": every reader goes through explicit projections or
+    # loader options, so an accidental lazy traversal (the classic N+1)
+    # fails fast instead of silently issuing per-row SELECTs
     chunks: Mapped[List["Chunk"]] = relationship(
-        back_populates="document", cascade="all, delete-orphan"
+        back_populates="document", cascade="all, delete-orphan", lazy="raise"
     )
     ingestion_jobs: Mapped[List["IngestionJob"]] = relationship(
         back_populates="document", cascade="all, delete-orphan"
@@ -109,8 +150,18 @@ class Document(Base):
 
     __table_args__ = (
         Index("idx_documents_user_id", "user_id"),
+        # Serves the re-ingestion dedup lookup in create_job
+        Index("idx_documents_user_content_hash", "user_id", "content_hash"),
         Index("idx_documents_created_at", "created_at"),
         Index("idx_documents_source_type", "source_type"),
+        # jsonb_path_ops: smaller/faster than the default jsonb_ops and
+        # covers the containment (@>) lookups metadata filtering uses
+        Index(
+            "idx_documents_metadata",
+            "metadata",
+            postgresql_using="gin",
+            postgresql_ops={"metadata": "jsonb_path_ops"},
+        ),
     )
 
 
@@ -118,13 +169,15 @@ class Chunk(Base):
     __tablename__ = "chunks"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     document_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False
     )
+    # Part of the primary key: hash-partitioned tables must include the
+    # partition key in every unique constraint
     user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+        UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True
     )
 
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -150,26 +203,51 @@ class Chunk(Base):
     source_offset_ms_end: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     # Additional metadata
-    chunk_metadata: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    chunk_metadata: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
 
-    # Full-text search vector (generated column)
+    # Text-search configuration, copied from the document at ingest;
+    # generated columns can't reference other tables, so it's
+    # denormalized here for the tsv expression
+    language: Mapped[str] = mapped_column(
+        String(32), nullable=False, default="english", server_default=sql_text("'english'")
+    )
+
+    # Full-text search vector (generated column, per-language lexer —
+    # running non-English text through the English stemmer destroys
+    # recall)
     tsv: Mapped[Optional[str]] = mapped_column(
         TSVECTOR,
-        Computed("to_tsvector('english', text)", persisted=True),
+        Computed(_TSV_EXPR, persisted=True),
         nullable=True
     )
 
     # Relationships
     document: Mapped["Document"] = relationship(back_populates="chunks")
     embedding: Mapped[Optional["ChunkEmbedding"]] = relationship(
-        back_populates="chunk", uselist=False, cascade="all, delete-orphan"
+        back_populates="chunk", uselist=False, cascade="all, delete-orphan",
+        lazy="raise",
     )
 
     __table_args__ = (
-        Index("idx_chunks_document_id", "document_id"),
+        # Covering index for citation rendering: position markers ride
+        # along in the leaf pages, so the top-k fan-out can be served by
+        # index-only scans instead of per-row heap fetches (text stays
+        # out — it's TOASTed)
+        Index(
+            "idx_chunks_doc_cover",
+            "document_id",
+            postgresql_include=[
+                "chunk_index", "page_start", "page_end", "time_start", "time_end"
+            ],
+        ),
         Index("idx_chunks_user_id", "user_id"),
         Index("idx_chunks_time_start", "time_start"),
         Index("idx_chunks_tsv", "tsv", postgresql_using="gin"),
+        # Hash-partitioned per tenant: every query filters on user_id,
+        # so the planner prunes to one partition and each partition's
+        # indexes stay small enough to remain cached. Child partitions
+        # are created in init_db.
+        {"postgresql_partition_by": "HASH (user_id)"},
     )
 
 
@@ -177,12 +255,16 @@ class ChunkEmbedding(Base):
     __tablename__ = "chunk_embeddings"
 
     chunk_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True),
-        ForeignKey("chunks.id", ondelete="CASCADE"),
-        primary_key=True
+        UUID(as_uuid=True), primary_key=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True
     )
+    # halfvec stores float16 — half the bytes per row, and the HNSW
+    # traversal is memory-bandwidth-bound; recall loss is negligible at
+    # 1536 dims
     embedding: Mapped[List[float]] = mapped_column(
-        Vector(settings.embedding_dimensions), nullable=False
+        HALFVEC(settings.embedding_dimensions), nullable=False
     )
     embedding_model: Mapped[str] = mapped_column(String(100), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
@@ -193,12 +275,46 @@ class ChunkEmbedding(Base):
     chunk: Mapped["Chunk"] = relationship(back_populates="embedding")
 
     __table_args__ = (
+        ForeignKeyConstraint(
+            ["chunk_id", "user_id"],
+            ["chunks.id", "chunks.user_id"],
+            ondelete="CASCADE",
+        ),
         Index(
             "idx_chunk_embeddings_vector",
             "embedding",
             postgresql_using="hnsw",
-            postgresql_ops={"embedding": "vector_cosine_ops"}
+            postgresql_ops={"embedding": "halfvec_cosine_ops"},
+            postgresql_with={
+                "m": settings.hnsw_m,
+                "ef_construction": settings.hnsw_ef_construction,
+            },
         ),
+        # Partitioned like chunks, so each tenant's HNSW graph is its
+        # own small partition-local index instead of one monolithic
+        # graph that pgvector can't filter during traversal
+        {"postgresql_partition_by": "HASH (user_id)"},
+    )
+
+
+class EmbeddingCache(Base):
+    """Cache of embeddings keyed by content hash and model.
+
+    Re-ingested documents and repeated chunk text (boilerplate headers,
+    near-duplicate uploads) hit this table instead of the embedding API,
+    which is the dominant ingestion cost. Shared across users — the key
+    is the text itself, not who uploaded it.
+    """
+
+    __tablename__ = "embedding_cache"
+
+    text_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String(100), primary_key=True)
+    embedding: Mapped[List[float]] = mapped_column(
+        HALFVEC(settings.embedding_dimensions), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
     )
 
 
@@ -206,7 +322,7 @@ class IngestionJob(Base):
     __tablename__ = "ingestion_jobs"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
@@ -243,7 +359,7 @@ class Conversation(Base):
     __tablename__ = "conversations"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
@@ -259,7 +375,7 @@ class Conversation(Base):
     # Relationships
     user: Mapped["User"] = relationship(back_populates="conversations")
     messages: Mapped[List["Message"]] = relationship(
-        back_populates="conversation", cascade="all, delete-orphan"
+        back_populates="conversation", cascade="all, delete-orphan", lazy="raise"
     )
 
 
@@ -267,14 +383,14 @@ class Message(Base):
     __tablename__ = "messages"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     conversation_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False
     )
     role: Mapped[str] = mapped_column(String(20), nullable=False)  # 'user' or 'assistant'
     content: Mapped[str] = mapped_column(Text, nullable=False)
-    citations: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    citations: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
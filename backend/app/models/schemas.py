@@ -129,6 +129,18 @@ class MessageResponse(BaseModel):
         from_attributes = True
 
 
+class ConversationSummaryResponse(BaseModel):
+    """Conversation list item — no messages, cheap to hydrate."""
+    id: UUID
+    title: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    message_count: int
+
+    class Config:
+        from_attributes = True
+
+
 class ConversationResponse(BaseModel):
     id: UUID
     title: Optional[str]
@@ -152,3 +164,8 @@ class RetrievedChunk(BaseModel):
     page_end: Optional[int]
     time_start: Optional[datetime]
     time_end: Optional[datetime]
+    # Citation display strings, computed once at retrieval time so
+    # repeated citation builds don't redo the slicing/formatting
+    snippet: str = ""
+    page_range: Optional[str] = None
+    time_range: Optional[str] = None
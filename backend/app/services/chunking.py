@@ -1,3 +1,5 @@
+import re
+from bisect import bisect_right
 from typing import List, Optional
 from dataclasses import dataclass
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -6,6 +8,82 @@ from app.config import settings
 from app.services.embeddings import embedding_service
 
 
+class _CachedSeparatorSplitter(RecursiveCharacterTextSplitter):
+    """RecursiveCharacterTextSplitter with precompiled separator regexes.
+
+    The base class re-escapes its separators and goes through the re
+    module cache on every recursion step of _split_text; for documents
+    in the megabyte range that per-call overhead is measurable. The
+    patterns are compiled once here and the recursion reuses them.
+    """
+
+    def __init__(self, separators: List[str], **kwargs):
+        super().__init__(separators=separators, **kwargs)
+        self._search_patterns = {
+            s: re.compile(re.escape(s)) for s in separators if s
+        }
+        # Capturing group so split() keeps the delimiters, mirroring the
+        # base class's keep_separator handling
+        self._split_patterns = {
+            s: re.compile(f"({re.escape(s)})") for s in separators if s
+        }
+
+    def _split_on_separator(self, text: str, separator: str) -> List[str]:
+        if not separator:
+            return list(text)
+        if self._keep_separator:
+            parts = self._split_patterns[separator].split(text)
+            splits = (
+                [parts[i] + parts[i + 1] for i in range(0, len(parts) - 1, 2)]
+                if self._keep_separator == "end"
+                else [parts[i] + parts[i + 1] for i in range(1, len(parts), 2)]
+            )
+            if len(parts) % 2 == 0:
+                splits += parts[-1:]
+            splits = (
+                [*splits, parts[-1]]
+                if self._keep_separator == "end"
+                else [parts[0], *splits]
+            )
+        else:
+            splits = self._search_patterns[separator].split(text)
+        return [s for s in splits if s]
+
+    def _split_text(self, text: str, separators: List[str]) -> List[str]:
+        final_chunks: List[str] = []
+        separator = separators[-1]
+        new_separators: List[str] = []
+        for i, sep in enumerate(separators):
+            if not sep:
+                separator = sep
+                break
+            if self._search_patterns[sep].search(text):
+                separator = sep
+                new_separators = separators[i + 1:]
+                break
+
+        splits = self._split_on_separator(text, separator)
+
+        good_splits: List[str] = []
+        merge_separator = "" if self._keep_separator else separator
+        for split in splits:
+            if self._length_function(split) < self._chunk_size:
+                good_splits.append(split)
+            else:
+                if good_splits:
+                    final_chunks.extend(
+                        self._merge_splits(good_splits, merge_separator)
+                    )
+                    good_splits = []
+                if not new_separators:
+                    final_chunks.append(split)
+                else:
+                    final_chunks.extend(self._split_text(split, new_separators))
+        if good_splits:
+            final_chunks.extend(self._merge_splits(good_splits, merge_separator))
+        return final_chunks
+
+
 @dataclass
 class ChunkData:
     """Represents a chunk of text with metadata."""
@@ -25,11 +103,12 @@ class ChunkingService:
     """Service for splitting documents into chunks."""
 
     def __init__(self):
-        self.splitter = RecursiveCharacterTextSplitter(
+        self.splitter = _CachedSeparatorSplitter(
             chunk_size=settings.chunk_size * 4,  # Approximate chars
             chunk_overlap=settings.chunk_overlap * 4,
             length_function=len,
             separators=["\n\n", "\n", ". ", " ", ""],
+            add_start_index=True,
         )
 
     def chunk_text(
@@ -50,41 +129,48 @@ class ChunkingService:
         if not text.strip():
             return []
 
-        # Use langchain splitter for initial splits
-        splits = self.splitter.split_text(text)
+        # Use langchain splitter for initial splits; with add_start_index
+        # the splitter reports each chunk's offset, so there's no
+        # per-chunk text.find() rescan of the whole document
+        docs = self.splitter.create_documents([text])
+        splits = [doc.page_content for doc in docs]
+
+        # Page starts are sorted, so chunk->page mapping is a binary
+        # search instead of a scan over every page per chunk
+        page_starts = []
+        page_nums = []
+        if page_boundaries:
+            page_starts = [p_start for _, p_start, _ in page_boundaries]
+            page_nums = [page_num for page_num, _, _ in page_boundaries]
+
+        # Tokenize all splits in one batched call
+        token_counts = embedding_service.count_tokens_batch(splits)
 
         chunks = []
-        current_pos = 0
 
-        for idx, split_text in enumerate(splits):
-            # Find the position of this chunk in the original text
-            char_start = text.find(split_text, current_pos)
-            if char_start == -1:
-                char_start = current_pos
+        for idx, (split_text, doc) in enumerate(zip(splits, docs)):
+            char_start = doc.metadata["start_index"]
             char_end = char_start + len(split_text)
-            current_pos = char_start + 1
 
             # Determine page numbers if boundaries provided
             page_start = None
             page_end = None
-            if page_boundaries:
-                for page_num, p_start, p_end in page_boundaries:
-                    if p_start <= char_start < p_end:
-                        page_start = page_num
-                    if p_start < char_end <= p_end:
-                        page_end = page_num
+            if page_starts:
+                i = bisect_right(page_starts, char_start) - 1
+                if i >= 0:
+                    page_start = page_nums[i]
+                j = bisect_right(page_starts, max(char_end - 1, 0)) - 1
+                if j >= 0:
+                    page_end = page_nums[j]
                 if page_start and not page_end:
                     page_end = page_start
 
-            # Count tokens
-            token_count = embedding_service.count_tokens(split_text)
-
             chunks.append(ChunkData(
                 text=split_text,
                 chunk_index=idx,
                 char_start=char_start,
                 char_end=char_end,
-                token_count=token_count,
+                token_count=token_counts[idx],
                 page_start=page_start,
                 page_end=page_end,
             ))
@@ -109,12 +195,13 @@ class ChunkingService:
         if not segments:
             return []
 
-        chunks = []
+        # First pass: group segments into chunk texts and time spans;
+        # token counting is deferred so it can run as one batched call
+        chunk_texts: List[str] = []
+        chunk_spans: List[tuple] = []
         current_texts = []
         current_start_ms = None
         current_end_ms = None
-        chunk_index = 0
-        char_offset = 0
 
         for segment in segments:
             seg_text = segment.get("text", "").strip()
@@ -133,40 +220,34 @@ class ChunkingService:
             # Check if we've reached target duration
             duration = current_end_ms - current_start_ms
             if duration >= target_duration_ms:
-                # Create chunk
-                chunk_text = " ".join(current_texts)
-                token_count = embedding_service.count_tokens(chunk_text)
-
-                chunks.append(ChunkData(
-                    text=chunk_text,
-                    chunk_index=chunk_index,
-                    char_start=char_offset,
-                    char_end=char_offset + len(chunk_text),
-                    token_count=token_count,
-                    time_start_ms=current_start_ms,
-                    time_end_ms=current_end_ms,
-                ))
-
-                char_offset += len(chunk_text) + 1
-                chunk_index += 1
+                chunk_texts.append(" ".join(current_texts))
+                chunk_spans.append((current_start_ms, current_end_ms))
                 current_texts = []
                 current_start_ms = None
                 current_end_ms = None
 
         # Handle remaining segments
         if current_texts:
-            chunk_text = " ".join(current_texts)
-            token_count = embedding_service.count_tokens(chunk_text)
+            chunk_texts.append(" ".join(current_texts))
+            chunk_spans.append((current_start_ms, current_end_ms))
+
+        token_counts = embedding_service.count_tokens_batch(chunk_texts)
 
+        chunks = []
+        char_offset = 0
+        for chunk_index, (chunk_text, (start_ms, end_ms), token_count) in enumerate(
+            zip(chunk_texts, chunk_spans, token_counts)
+        ):
             chunks.append(ChunkData(
                 text=chunk_text,
                 chunk_index=chunk_index,
                 char_start=char_offset,
                 char_end=char_offset + len(chunk_text),
                 token_count=token_count,
-                time_start_ms=current_start_ms,
-                time_end_ms=current_end_ms,
+                time_start_ms=start_ms,
+                time_end_ms=end_ms,
             ))
+            char_offset += len(chunk_text) + 1
 
         return chunks
 
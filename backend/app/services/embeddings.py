@@ -1,44 +1,159 @@
+import asyncio
+import os
+import random
+from collections import OrderedDict
+
+import numpy as np
 import tiktoken
 from typing import List
-from openai import AsyncOpenAI
+from openai import APIConnectionError, InternalServerError, RateLimitError
 
 from app.config import settings
+from app.services.openai_client import shared_async_openai
+
+
+# Embedding request packing: the API rejects batches over its token
+# budget and caps items per request; two pipelined medium batches also
+# beat one giant call on tail latency
+MAX_BATCH_ITEMS = 2048
+MAX_BATCH_TOKENS = 250_000
+
+# In-flight cap and retry policy for concurrent embedding batches:
+# enough parallelism to hide latency without tripping the rate limiter,
+# and per-batch backoff so one 429 retries alone instead of failing
+# its siblings
+MAX_CONCURRENT_BATCHES = 4
+MAX_BATCH_RETRIES = 3
+
+_RETRIABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+# Bound for the in-process query-embedding LRU; ~1536 floats per entry
+# keeps the whole cache under ~50MB at this size
+QUERY_CACHE_MAX = 4096
 
 
 class EmbeddingService:
     """Service for generating text embeddings using OpenAI."""
 
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = shared_async_openai
         self.model = settings.embedding_model
         self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        # LRU of single-text (query) embeddings — chat follow-ups and
+        # evaluation sweeps repeat the same cleaned query often
+        self._query_cache: OrderedDict = OrderedDict()
 
     def count_tokens(self, text: str) -> int:
-        """Count tokens in a text string."""
-        return len(self.tokenizer.encode(text))
+        """Count tokens in a text string.
+
+        encode_ordinary skips the special-token regex pass — user
+        content never contains special tokens, and counting doesn't
+        need them.
+        """
+        return len(self.tokenizer.encode_ordinary(text))
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Count tokens for many strings in one tokenizer call.
+
+        encode_batch releases the GIL and runs the BPE across Rust
+        threads — much faster than per-string encode for the hundreds
+        of chunks a document produces.
+        """
+        if not texts:
+            return []
+        return [
+            len(tokens)
+            for tokens in self.tokenizer.encode_ordinary_batch(
+                texts, num_threads=os.cpu_count()
+            )
+        ]
+
+    async def _embed_batch(self, batch: List[str], semaphore: asyncio.Semaphore):
+        """One embeddings request under the shared concurrency cap.
+
+        Transient failures back off exponentially with jitter; the
+        initial jitter keeps concurrent batches from hitting the rate
+        limiter in lockstep.
+        """
+        async with semaphore:
+            await asyncio.sleep(random.uniform(0, 0.1))
+            delay = 1.0
+            for attempt in range(MAX_BATCH_RETRIES):
+                try:
+                    return await self.client.embeddings.create(
+                        model=self.model, input=batch
+                    )
+                except _RETRIABLE_ERRORS:
+                    if attempt == MAX_BATCH_RETRIES - 1:
+                        raise
+                    await asyncio.sleep(delay + random.uniform(0, delay))
+                    delay *= 2
 
     async def embed_text(self, text: str) -> List[float]:
-        """Generate embedding for a single text."""
+        """Generate embedding for a single text, with LRU memoization.
+
+        Keyed on (model, text) so a model change never serves stale
+        vectors; a hit skips the API call entirely.
+        """
+        key = (self.model, text)
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            self._query_cache.move_to_end(key)
+            return cached
+
         response = await self.client.embeddings.create(
             model=self.model,
             input=text,
         )
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
+
+        self._query_cache[key] = embedding
+        if len(self._query_cache) > QUERY_CACHE_MAX:
+            self._query_cache.popitem(last=False)
+        return embedding
+
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for multiple texts in batch.
 
-    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts in batch."""
+        Returns one contiguous float32 array (rows in input order);
+        pgvector serializes numpy rows directly, skipping per-element
+        Python float conversion on insert.
+        """
         if not texts:
-            return []
+            return np.empty((0, settings.embedding_dimensions), dtype=np.float32)
 
-        # OpenAI allows batch embedding
-        response = await self.client.embeddings.create(
-            model=self.model,
-            input=texts,
-        )
+        # Greedily pack inputs into batches under the API's token/item
+        # caps, then issue them concurrently; batches are built in input
+        # order so concatenating responses preserves it
+        token_counts = self.count_tokens_batch(texts)
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for item_text, item_tokens in zip(texts, token_counts):
+            if current and (
+                len(current) >= MAX_BATCH_ITEMS
+                or current_tokens + item_tokens > MAX_BATCH_TOKENS
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(item_text)
+            current_tokens += item_tokens
+        batches.append(current)
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+        responses = await asyncio.gather(*[
+            self._embed_batch(batch, semaphore) for batch in batches
+        ])
 
-        # Sort by index to maintain order
-        sorted_data = sorted(response.data, key=lambda x: x.index)
-        return [item.embedding for item in sorted_data]
+        rows = []
+        for response in responses:
+            # Responses arrive in input order; only sort if that breaks
+            data = response.data
+            if any(item.index != i for i, item in enumerate(data)):
+                data = sorted(data, key=lambda x: x.index)
+            rows.extend(item.embedding for item in data)
+        return np.asarray(rows, dtype=np.float32)
 
 
 # Singleton instance
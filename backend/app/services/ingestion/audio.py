@@ -1,12 +1,16 @@
 import os
-import tempfile
 from typing import Optional
 from dataclasses import dataclass
 from datetime import datetime
-import aiofiles
-from openai import AsyncOpenAI
 
-from app.config import settings
+from app.services.openai_client import shared_async_openai
+
+# Imported once at module load; pydub is an optional convenience for
+# metadata, so a missing install just disables that enrichment
+try:
+    from pydub import AudioSegment as _AudioSegment
+except Exception:  # pragma: no cover - import-time environment issue
+    _AudioSegment = None
 
 
 @dataclass
@@ -24,7 +28,7 @@ class AudioProcessor:
     SUPPORTED_FORMATS = {".mp3", ".mp4", ".m4a", ".wav", ".webm", ".mpeg", ".mpga", ".oga", ".ogg"}
 
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = shared_async_openai
 
     def is_supported(self, filename: str) -> bool:
         """Check if the file format is supported."""
@@ -46,57 +50,41 @@ class AudioProcessor:
         Returns:
             AudioTranscript with text and segments
         """
-        # Read the file
-        async with aiofiles.open(file_path, "rb") as f:
-            file_content = await f.read()
-
-        # Create a temporary file for the API
-        filename = os.path.basename(file_path)
-        ext = os.path.splitext(filename)[1]
-
-        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
-            tmp.write(file_content)
-            tmp_path = tmp.name
-
-        try:
-            # Call Whisper API with timestamps
-            with open(tmp_path, "rb") as audio_file:
-                response = await self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="verbose_json",
-                    timestamp_granularities=["segment"],
-                    language=language,
-                )
-
-            # Parse response
-            segments = []
-            if hasattr(response, "segments") and response.segments:
-                for seg in response.segments:
-                    segments.append({
-                        "text": seg.get("text", "").strip(),
-                        "start_ms": int(seg.get("start", 0) * 1000),
-                        "end_ms": int(seg.get("end", 0) * 1000),
-                    })
-
-            # Calculate duration
-            duration_ms = 0
-            if segments:
-                duration_ms = segments[-1]["end_ms"]
-            elif hasattr(response, "duration"):
-                duration_ms = int(response.duration * 1000)
-
-            return AudioTranscript(
-                text=response.text,
-                segments=segments,
-                duration_ms=duration_ms,
-                language=getattr(response, "language", None),
+        # Hand the file straight to the SDK — it streams the upload, so
+        # there's no need to read the whole file into memory or copy it
+        # to a second temp file first
+        with open(file_path, "rb") as audio_file:
+            response = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+                response_format="verbose_json",
+                timestamp_granularities=["segment"],
+                language=language,
             )
 
-        finally:
-            # Clean up temp file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+        # Parse response
+        segments = []
+        if hasattr(response, "segments") and response.segments:
+            for seg in response.segments:
+                segments.append({
+                    "text": seg.get("text", "").strip(),
+                    "start_ms": int(seg.get("start", 0) * 1000),
+                    "end_ms": int(seg.get("end", 0) * 1000),
+                })
+
+        # Calculate duration
+        duration_ms = 0
+        if segments:
+            duration_ms = segments[-1]["end_ms"]
+        elif hasattr(response, "duration"):
+            duration_ms = int(response.duration * 1000)
+
+        return AudioTranscript(
+            text=response.text,
+            segments=segments,
+            duration_ms=duration_ms,
+            language=getattr(response, "language", None),
+        )
 
     def extract_metadata(self, file_path: str) -> dict:
         """Extract metadata from audio file."""
@@ -106,15 +94,17 @@ class AudioProcessor:
             "processed_at": datetime.utcnow().isoformat(),
         }
 
-        # Try to get duration using pydub if available
-        try:
-            from pydub import AudioSegment
-            audio = AudioSegment.from_file(file_path)
-            metadata["duration_seconds"] = len(audio) / 1000.0
-            metadata["channels"] = audio.channels
-            metadata["sample_rate"] = audio.frame_rate
-        except Exception:
-            pass
+        # Try to get duration using pydub if available; passing the
+        # format from the extension skips ffprobe's per-file sniff
+        if _AudioSegment is not None:
+            try:
+                ext = os.path.splitext(file_path)[1].lstrip(".").lower() or None
+                audio = _AudioSegment.from_file(file_path, format=ext)
+                metadata["duration_seconds"] = len(audio) / 1000.0
+                metadata["channels"] = audio.channels
+                metadata["sample_rate"] = audio.frame_rate
+            except Exception:
+                pass
 
         return metadata
 
@@ -1,18 +1,25 @@
+import asyncio
 import os
 import uuid
 import hashlib
+import logging
 import aiofiles
-from datetime import datetime, timezone
+import orjson
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from pgvector.asyncpg import register_vector
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from uuid6 import uuid7
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.db import AsyncSessionLocal
 from app.models.models import (
-    Document, Chunk, ChunkEmbedding, IngestionJob,
-    SourceType, JobStatus, JobStage
+    Document, EmbeddingCache, IngestionJob,
+    SourceType, JobStatus, JobStage, FTS_CONFIGS
 )
 from app.services.embeddings import embedding_service
 from app.services.chunking import chunking_service
@@ -20,373 +27,502 @@ from app.services.ingestion.audio import audio_processor
 from app.services.ingestion.documents import document_processor
 from app.services.ingestion.web import web_processor
 
+logger = logging.getLogger(__name__)
 
-class IngestionPipeline:
-    """Orchestrates the ingestion of various content types."""
+# Postgres text-search configs we can map Whisper's detected language
+# onto; anything else falls back to 'simple' (no stemming) rather than
+# mangling it with the English lexer. The canonical list lives next to
+# the tsv generation expression it feeds.
+_FTS_CONFIGS = frozenset(FTS_CONFIGS)
 
-    def __init__(self, db: AsyncSession):
-        self.db = db
 
-    async def ingest_text(
-        self,
-        user_id: UUID,
-        text: str,
-        title: Optional[str] = None,
-        created_at: Optional[datetime] = None,
-    ) -> Document:
-        """Ingest plain text content."""
-        content_hash = hashlib.sha256(text.encode()).hexdigest()
+def _fts_config_for(language: Optional[str]) -> str:
+    if language and language.lower() in _FTS_CONFIGS:
+        return language.lower()
+    return "simple"
 
-        # Create document
-        doc = Document(
-            user_id=user_id,
-            source_type=SourceType.TEXT,
-            title=title or text[:100].strip() + "..." if len(text) > 100 else text.strip(),
-            content_text=text,
-            content_hash=content_hash,
-            created_at=created_at or datetime.now(timezone.utc),
-            status=JobStatus.RUNNING,
-        )
-        self.db.add(doc)
-        await self.db.flush()
 
-        # Create ingestion job
-        job = IngestionJob(
-            user_id=user_id,
-            document_id=doc.id,
-            status=JobStatus.RUNNING,
-            stage=JobStage.RECEIVED,
-        )
-        self.db.add(job)
-        await self.db.flush()
+# Slice size (in characters) for incremental text hashing
+_HASH_CHUNK_CHARS = 1 << 20
 
-        try:
-            # Chunk the text
-            await self._update_job_stage(job, JobStage.CHUNKED)
-            chunks_data = chunking_service.chunk_text(text)
-
-            # Create chunks and embeddings
-            await self._update_job_stage(job, JobStage.EMBEDDED)
-            await self._create_chunks_with_embeddings(doc, user_id, chunks_data)
-
-            # Mark complete
-            await self._update_job_stage(job, JobStage.INDEXED)
-            job.status = JobStatus.COMPLETED
-            doc.status = JobStatus.COMPLETED
-            doc.ingested_at = datetime.now(timezone.utc)
-
-        except Exception as e:
-            job.status = JobStatus.FAILED
-            job.error = str(e)
-            doc.status = JobStatus.FAILED
-            raise
 
-        await self.db.commit()
-        return doc
+def _sha256_text(text: str) -> str:
+    """Hash a string's UTF-8 form without materializing it all at once.
 
-    async def ingest_url(self, user_id: UUID, url: str) -> Document:
-        """Ingest content from a URL."""
-        # Fetch and extract content
-        web_content = await web_processor.fetch_and_extract(url)
-        content_hash = hashlib.sha256(web_content.text.encode()).hexdigest()
+    Encoding per-slice is byte-identical to encoding the whole string,
+    so this matches hashlib.sha256(text.encode()) while keeping peak
+    memory at one slice instead of a full second copy of the document.
+    """
+    hasher = hashlib.sha256()
+    for start in range(0, len(text), _HASH_CHUNK_CHARS):
+        hasher.update(text[start:start + _HASH_CHUNK_CHARS].encode())
+    return hasher.hexdigest()
 
-        # Create document
-        doc = Document(
-            user_id=user_id,
-            source_type=SourceType.WEB,
-            title=web_content.title or url,
-            source_uri=url,
-            content_text=web_content.text,
-            content_hash=content_hash,
-            created_at=web_content.published_at or datetime.now(timezone.utc),
-            fetched_at=datetime.now(timezone.utc),
-            metadata_=web_content.metadata,
-            status=JobStatus.RUNNING,
-        )
-        self.db.add(doc)
-        await self.db.flush()
 
-        # Create ingestion job
-        job = IngestionJob(
-            user_id=user_id,
-            document_id=doc.id,
-            status=JobStatus.RUNNING,
-            stage=JobStage.EXTRACTED,
-        )
-        self.db.add(job)
-        await self.db.flush()
+# Column lists for the COPY bulk-insert path; generated (tsv) and
+# defaulted (created_at) columns are left out so Postgres fills them
+_CHUNK_COPY_COLUMNS = (
+    "id", "document_id", "user_id", "chunk_index", "text", "token_count",
+    "char_start", "char_end", "page_start", "page_end",
+    "time_start", "time_end",
+    "source_offset_ms_start", "source_offset_ms_end",
+    "chunk_metadata", "language",
+)
+_EMBEDDING_COPY_COLUMNS = ("chunk_id", "user_id", "embedding", "embedding_model")
 
-        try:
-            # Chunk the text
-            await self._update_job_stage(job, JobStage.CHUNKED)
-            chunks_data = chunking_service.chunk_text(web_content.text)
+# Chunks per pipeline stage batch: large enough that each COPY amortizes
+# its round trip, small enough that the embed stage stays ahead of it
+_EMBED_WRITE_BATCH = 512
 
-            # Create chunks and embeddings
-            await self._update_job_stage(job, JobStage.EMBEDDED)
-            await self._create_chunks_with_embeddings(doc, user_id, chunks_data)
 
-            # Mark complete
-            await self._update_job_stage(job, JobStage.INDEXED)
-            job.status = JobStatus.COMPLETED
-            doc.status = JobStatus.COMPLETED
-            doc.ingested_at = datetime.now(timezone.utc)
+class IngestionPipeline:
+    """Orchestrates the ingestion of various content types.
 
-        except Exception as e:
-            job.status = JobStatus.FAILED
-            job.error = str(e)
-            doc.status = JobStatus.FAILED
-            raise
+    Ingestion is split in two phases: create_job() records the Document
+    and IngestionJob rows up front (cheap, done on the request), and
+    run_job() does the expensive extraction/chunking/embedding work,
+    typically from a background task via run_ingestion_job().
 
-        await self.db.commit()
-        return doc
+    The pipeline itself is stateless — all shared heavy state
+    (tokenizer, OpenAI client, processors) lives in the module-level
+    service singletons it calls — so one instance is shared across
+    requests and each method takes the session to use.
+    """
 
-    async def ingest_file(
+    async def create_job(
         self,
+        db: AsyncSession,
         user_id: UUID,
-        file_path: str,
-        original_filename: str,
         source_type: SourceType,
+        title: str,
+        source_uri: Optional[str] = None,
+        original_filename: Optional[str] = None,
+        content_text: Optional[str] = None,
+        content_hash: Optional[str] = None,
         created_at: Optional[datetime] = None,
-    ) -> Document:
-        """Ingest a file (audio or document)."""
-        # Determine file type and process accordingly
-        if source_type == SourceType.AUDIO:
-            return await self._ingest_audio(user_id, file_path, original_filename, created_at)
-        elif source_type in {SourceType.PDF, SourceType.MARKDOWN}:
-            return await self._ingest_document(user_id, file_path, original_filename, source_type, created_at)
-        else:
-            # Treat as text
-            async with aiofiles.open(file_path, "r") as f:
-                text = await f.read()
-            return await self.ingest_text(user_id, text, title=original_filename, created_at=created_at)
-
-    async def _ingest_audio(
-        self,
-        user_id: UUID,
-        file_path: str,
-        original_filename: str,
-        created_at: Optional[datetime] = None,
-    ) -> Document:
-        """Process and ingest an audio file."""
-        # Get file hash for idempotency
-        async with aiofiles.open(file_path, "rb") as f:
-            content = await f.read()
-        content_hash = hashlib.sha256(content).hexdigest()
-
-        # Save file to uploads directory
-        upload_dir = os.path.join(settings.upload_dir, str(user_id), "audio")
-        os.makedirs(upload_dir, exist_ok=True)
-        ext = os.path.splitext(original_filename)[1]
-        stored_filename = f"{uuid.uuid4()}{ext}"
-        stored_path = os.path.join(upload_dir, stored_filename)
-
-        async with aiofiles.open(stored_path, "wb") as f:
-            await f.write(content)
+    ) -> IngestionJob:
+        """Create the Document and IngestionJob rows for a queued ingestion.
+
+        If the same content was already ingested for this user, the
+        existing completed job is returned instead — re-uploads then
+        cost one SELECT rather than a full extract/chunk/embed pass.
+        """
+        if content_text is not None and content_hash is None:
+            content_hash = _sha256_text(content_text)
+
+        if content_hash is not None:
+            result = await db.execute(
+                select(IngestionJob)
+                .join(Document, IngestionJob.document_id == Document.id)
+                .where(
+                    Document.user_id == user_id,
+                    Document.content_hash == content_hash,
+                    Document.status == JobStatus.COMPLETED,
+                )
+                .order_by(IngestionJob.created_at.desc())
+                .limit(1)
+            )
+            existing = result.scalars().first()
+            if existing is not None:
+                return existing
 
-        # Create document
+        # Client-side id so the job row can reference the document
+        # without a flush round trip
         doc = Document(
+            id=uuid7(),
             user_id=user_id,
-            source_type=SourceType.AUDIO,
-            title=original_filename,
-            source_uri=stored_path,
+            source_type=source_type,
+            title=title,
+            source_uri=source_uri,
             original_filename=original_filename,
+            content_text=content_text,
             content_hash=content_hash,
             created_at=created_at or datetime.now(timezone.utc),
-            status=JobStatus.RUNNING,
+            status=JobStatus.QUEUED,
         )
-        self.db.add(doc)
-        await self.db.flush()
+        db.add(doc)
 
-        # Create ingestion job
         job = IngestionJob(
             user_id=user_id,
             document_id=doc.id,
-            status=JobStatus.RUNNING,
+            status=JobStatus.QUEUED,
             stage=JobStage.RECEIVED,
         )
-        self.db.add(job)
-        await self.db.flush()
+        db.add(job)
+        await db.commit()
+        return job
+
+    async def run_job(
+        self, db: AsyncSession, job_id: UUID, file_path: Optional[str] = None
+    ) -> Document:
+        """Run a queued ingestion job to completion."""
+        result = await db.execute(
+            select(IngestionJob).where(IngestionJob.id == job_id)
+        )
+        job = result.scalar_one()
+        result = await db.execute(
+            select(Document).where(Document.id == job.document_id)
+        )
+        doc = result.scalar_one()
+        document_id = doc.id
+
+        # Dedup hit in create_job — the content is already ingested and
+        # the background task has nothing to do
+        if job.status == JobStatus.COMPLETED:
+            return doc
+
+        job.status = JobStatus.RUNNING
+        doc.status = JobStatus.RUNNING
+        await db.flush()
 
         try:
-            # Transcribe audio
-            await self._update_job_stage(job, JobStage.EXTRACTED)
-            transcript = await audio_processor.transcribe(stored_path)
-
-            # Update document with transcript
-            doc.content_text = transcript.text
-            doc.metadata_ = {
-                "duration_ms": transcript.duration_ms,
-                "language": transcript.language,
-                "segment_count": len(transcript.segments),
-            }
-
-            # Chunk based on audio segments
-            await self._update_job_stage(job, JobStage.CHUNKED)
-            chunks_data = chunking_service.chunk_audio_segments(transcript.segments)
-
-            # Create chunks with embeddings
-            await self._update_job_stage(job, JobStage.EMBEDDED)
+            if doc.source_type == SourceType.WEB:
+                chunks_data = await self._process_url(db, doc, job)
+                base_time = None
+            elif doc.source_type == SourceType.AUDIO:
+                chunks_data = await self._process_audio(db, doc, job, file_path)
+                base_time = doc.created_at
+            elif doc.source_type in {SourceType.PDF, SourceType.MARKDOWN}:
+                chunks_data = await self._process_document(db, doc, job, file_path)
+                base_time = None
+            else:
+                chunks_data = await self._process_text(db, doc, job, file_path)
+                base_time = None
+
+            # Create chunks and embeddings
+            await self._update_job_stage(db, job, JobStage.EMBEDDED)
             await self._create_chunks_with_embeddings(
-                doc, user_id, chunks_data,
-                base_time=created_at or datetime.now(timezone.utc)
+                db,
+                doc, doc.user_id, chunks_data, base_time=base_time
             )
 
             # Mark complete
-            await self._update_job_stage(job, JobStage.INDEXED)
+            await self._update_job_stage(db, job, JobStage.INDEXED)
             job.status = JobStatus.COMPLETED
             doc.status = JobStatus.COMPLETED
             doc.ingested_at = datetime.now(timezone.utc)
+            await db.commit()
 
         except Exception as e:
-            job.status = JobStatus.FAILED
-            job.error = str(e)
-            doc.status = JobStatus.FAILED
-            raise
+            logger.exception(f"Ingestion job {job_id} failed: {e}")
+            # A DB-originated failure (COPY rejecting bad input, a
+            # constraint violation) leaves the session pending-rollback,
+            # so committing here would raise and the job would sit
+            # RUNNING forever. Roll back first, then record FAILED in a
+            # fresh transaction — via direct UPDATEs, since the rollback
+            # expires the ORM instances loaded above.
+            await db.rollback()
+            await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id)
+                .values(status=JobStatus.FAILED, error=str(e))
+            )
+            await db.execute(
+                update(Document)
+                .where(Document.id == document_id)
+                .values(status=JobStatus.FAILED)
+            )
+            await db.commit()
 
-        await self.db.commit()
         return doc
 
-    async def _ingest_document(
-        self,
-        user_id: UUID,
-        file_path: str,
-        original_filename: str,
-        source_type: SourceType,
-        created_at: Optional[datetime] = None,
-    ) -> Document:
-        """Process and ingest a document file."""
-        # Get file hash
-        async with aiofiles.open(file_path, "rb") as f:
-            content = await f.read()
-        content_hash = hashlib.sha256(content).hexdigest()
-
-        # Save file to uploads directory
-        upload_dir = os.path.join(settings.upload_dir, str(user_id), "documents")
-        os.makedirs(upload_dir, exist_ok=True)
-        ext = os.path.splitext(original_filename)[1]
-        stored_filename = f"{uuid.uuid4()}{ext}"
-        stored_path = os.path.join(upload_dir, stored_filename)
+    async def _process_text(
+        self, db: AsyncSession, doc: Document, job: IngestionJob,
+        file_path: Optional[str] = None,
+    ) -> list:
+        """Chunk plain text content (inline or from an uploaded file)."""
+        if doc.content_text is None and file_path:
+            # Read once as bytes: hashing the raw buffer goes straight
+            # to OpenSSL's hardware-accelerated SHA-256 and avoids
+            # re-encoding the decoded text just to hash it
+            async with aiofiles.open(file_path, "rb") as f:
+                raw = await f.read()
+            doc.content_text = raw.decode("utf-8", errors="replace")
+            if doc.content_hash is None:
+                doc.content_hash = hashlib.sha256(raw).hexdigest()
+
+        await self._update_job_stage(db, job, JobStage.CHUNKED)
+        # Chunking (splitting + tokenization) is CPU-bound; run it off
+        # the event loop so other requests keep moving
+        return await asyncio.to_thread(chunking_service.chunk_text, doc.content_text or "")
+
+    async def _process_url(
+        self, db: AsyncSession, doc: Document, job: IngestionJob
+    ) -> list:
+        """Fetch and chunk content from the document's URL."""
+        web_content = await web_processor.fetch_and_extract(doc.source_uri)
+        await self._update_job_stage(db, job, JobStage.EXTRACTED)
+
+        doc.title = web_content.title or doc.source_uri
+        doc.content_text = web_content.text
+        doc.content_hash = _sha256_text(web_content.text)
+        doc.created_at = web_content.published_at or doc.created_at
+        doc.fetched_at = datetime.now(timezone.utc)
+        doc.metadata_ = web_content.metadata
+
+        await self._update_job_stage(db, job, JobStage.CHUNKED)
+        return await asyncio.to_thread(chunking_service.chunk_text, web_content.text)
+
+    async def _process_audio(
+        self, db: AsyncSession, doc: Document, job: IngestionJob, file_path: str
+    ) -> list:
+        """Transcribe and chunk an uploaded audio file."""
+        stored_path = await self._store_upload(doc, file_path, "audio")
+
+        # Transcription is network-bound and metadata extraction
+        # (pydub/ffmpeg) is blocking CPU work — run them concurrently,
+        # the latter on a worker thread
+        transcript, file_metadata = await asyncio.gather(
+            audio_processor.transcribe(stored_path),
+            asyncio.to_thread(audio_processor.extract_metadata, stored_path),
+        )
+        await self._update_job_stage(db, job, JobStage.EXTRACTED)
+
+        doc.content_text = transcript.text
+        doc.language = _fts_config_for(transcript.language)
+        doc.metadata_ = {
+            **file_metadata,
+            "duration_ms": transcript.duration_ms,
+            "language": transcript.language,
+            "segment_count": len(transcript.segments),
+        }
+
+        # Chunk based on audio segments
+        await self._update_job_stage(db, job, JobStage.CHUNKED)
+        return await asyncio.to_thread(
+            chunking_service.chunk_audio_segments, transcript.segments
+        )
 
-        async with aiofiles.open(stored_path, "wb") as f:
-            await f.write(content)
+    async def _process_document(
+        self, db: AsyncSession, doc: Document, job: IngestionJob, file_path: str
+    ) -> list:
+        """Extract and chunk an uploaded document file (PDF, markdown)."""
+        stored_path = await self._store_upload(doc, file_path, "documents")
 
         # Extract document content
         extracted = await document_processor.process(stored_path)
-
-        # Create document
-        doc = Document(
-            user_id=user_id,
-            source_type=source_type,
-            title=extracted.title or original_filename,
-            source_uri=stored_path,
-            original_filename=original_filename,
-            content_text=extracted.text,
-            content_hash=content_hash,
-            created_at=created_at or datetime.now(timezone.utc),
-            metadata_=extracted.metadata,
-            status=JobStatus.RUNNING,
-        )
-        self.db.add(doc)
-        await self.db.flush()
-
-        # Create ingestion job
-        job = IngestionJob(
-            user_id=user_id,
-            document_id=doc.id,
-            status=JobStatus.RUNNING,
-            stage=JobStage.EXTRACTED,
+        await self._update_job_stage(db, job, JobStage.EXTRACTED)
+
+        if extracted.title:
+            doc.title = extracted.title
+        doc.content_text = extracted.text
+        doc.metadata_ = extracted.metadata
+
+        # Chunk the document
+        await self._update_job_stage(db, job, JobStage.CHUNKED)
+        return await asyncio.to_thread(
+            chunking_service.chunk_text,
+            extracted.text,
+            page_boundaries=extracted.page_boundaries,
         )
-        self.db.add(job)
-        await self.db.flush()
-
-        try:
-            # Chunk the document
-            await self._update_job_stage(job, JobStage.CHUNKED)
-            chunks_data = chunking_service.chunk_text(
-                extracted.text,
-                page_boundaries=extracted.page_boundaries
-            )
 
-            # Create chunks with embeddings
-            await self._update_job_stage(job, JobStage.EMBEDDED)
-            await self._create_chunks_with_embeddings(doc, user_id, chunks_data)
-
-            # Mark complete
-            await self._update_job_stage(job, JobStage.INDEXED)
-            job.status = JobStatus.COMPLETED
-            doc.status = JobStatus.COMPLETED
-            doc.ingested_at = datetime.now(timezone.utc)
+    async def _store_upload(self, doc: Document, file_path: str, subdir: str) -> str:
+        """Copy an uploaded temp file into the uploads directory."""
+        upload_dir = os.path.join(settings.upload_dir, str(doc.user_id), subdir)
+        os.makedirs(upload_dir, exist_ok=True)
+        ext = os.path.splitext(doc.original_filename or file_path)[1]
+        stored_path = os.path.join(upload_dir, f"{uuid.uuid4()}{ext}")
 
-        except Exception as e:
-            job.status = JobStatus.FAILED
-            job.error = str(e)
-            doc.status = JobStatus.FAILED
-            raise
+        # Stream in 1 MiB pieces — a 500MB audio upload should never be
+        # resident in memory just to be copied
+        async with aiofiles.open(file_path, "rb") as src:
+            async with aiofiles.open(stored_path, "wb") as dst:
+                while chunk := await src.read(1 << 20):
+                    await dst.write(chunk)
 
-        await self.db.commit()
-        return doc
+        doc.source_uri = stored_path
+        return stored_path
 
     async def _create_chunks_with_embeddings(
         self,
+        db: AsyncSession,
         doc: Document,
         user_id: UUID,
         chunks_data: list,
         base_time: Optional[datetime] = None,
     ):
-        """Create chunk records and their embeddings."""
+        """Create chunk records and their embeddings.
+
+        Embedding and writing run as two overlapping stages joined by a
+        bounded queue: while one slice of chunks is being COPYed, the
+        next slice is already out at the embedding API. For documents
+        spanning several slices this hides most of the write time behind
+        the (much slower) embedding calls. The embed stage uses its own
+        session so its cache reads/writes don't contend with the COPY
+        on the job session's connection.
+        """
         if not chunks_data:
             return
 
-        # Batch embed all chunks
-        texts = [c.text for c in chunks_data]
-        embeddings = await embedding_service.embed_texts(texts)
-
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+        async def embed_stage():
+            try:
+                async with AsyncSessionLocal() as cache_db:
+                    for start in range(0, len(chunks_data), _EMBED_WRITE_BATCH):
+                        batch = chunks_data[start:start + _EMBED_WRITE_BATCH]
+                        embeddings = await self._embed_with_cache(
+                            cache_db, [c.text for c in batch]
+                        )
+                        # Cache rows persist even if the job later fails;
+                        # the embedding spend already happened
+                        await cache_db.commit()
+                        await queue.put((batch, embeddings))
+            finally:
+                await queue.put(None)
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(embed_stage())
+            while (item := await queue.get()) is not None:
+                batch, embeddings = item
+                chunk_rows, embedding_rows = self._build_chunk_rows(
+                    doc, user_id, batch, embeddings, base_time
+                )
+                await self._bulk_copy(db, chunk_rows, embedding_rows)
+
+    def _build_chunk_rows(
+        self,
+        doc: Document,
+        user_id: UUID,
+        chunks_data: list,
+        embeddings: list,
+        base_time: Optional[datetime],
+    ) -> tuple:
+        """Build COPY record tuples for a slice of chunks.
+
+        Chunk ids are generated client-side so embedding rows can
+        reference them without a per-row flush round trip; rows then go
+        in via COPY, which beats even batched INSERTs by an order of
+        magnitude for the thousands of chunks a long PDF or audio file
+        produces.
+        """
+        chunk_rows = []
+        embedding_rows = []
         for chunk_data, embedding in zip(chunks_data, embeddings):
             # Calculate time_start/time_end for audio chunks
             time_start = None
             time_end = None
             if chunk_data.time_start_ms is not None and base_time:
-                from datetime import timedelta
                 time_start = base_time + timedelta(milliseconds=chunk_data.time_start_ms)
                 time_end = base_time + timedelta(milliseconds=chunk_data.time_end_ms)
 
-            # Create chunk
-            chunk = Chunk(
-                document_id=doc.id,
-                user_id=user_id,
-                chunk_index=chunk_data.chunk_index,
-                text=chunk_data.text,
-                token_count=chunk_data.token_count,
-                char_start=chunk_data.char_start,
-                char_end=chunk_data.char_end,
-                page_start=chunk_data.page_start,
-                page_end=chunk_data.page_end,
-                time_start=time_start,
-                time_end=time_end,
-                source_offset_ms_start=chunk_data.time_start_ms,
-                source_offset_ms_end=chunk_data.time_end_ms,
-                chunk_metadata=chunk_data.metadata,
+            chunk_id = uuid7()
+            chunk_rows.append((
+                chunk_id,
+                doc.id,
+                user_id,
+                chunk_data.chunk_index,
+                chunk_data.text,
+                chunk_data.token_count,
+                chunk_data.char_start,
+                chunk_data.char_end,
+                chunk_data.page_start,
+                chunk_data.page_end,
+                time_start,
+                time_end,
+                chunk_data.time_start_ms,
+                chunk_data.time_end_ms,
+                orjson.dumps(chunk_data.metadata).decode()
+                if chunk_data.metadata is not None else None,
+                doc.language,
+            ))
+            embedding_rows.append(
+                (chunk_id, user_id, embedding, settings.embedding_model)
             )
-            self.db.add(chunk)
-            await self.db.flush()
-
-            # Create embedding
-            chunk_embedding = ChunkEmbedding(
-                chunk_id=chunk.id,
-                embedding=embedding,
-                embedding_model=settings.embedding_model,
+
+        return chunk_rows, embedding_rows
+
+    async def _embed_with_cache(self, db: AsyncSession, texts: list) -> list:
+        """Embed texts, reusing cached vectors for previously seen text.
+
+        Re-ingests and repeated chunk text (boilerplate, duplicate
+        uploads) skip the embedding API entirely; only genuinely new
+        text is embedded, and its vectors are written back with
+        ON CONFLICT DO NOTHING so concurrent jobs don't collide.
+        """
+        model = settings.embedding_model
+        hashes = [hashlib.sha256(t.encode()).hexdigest() for t in texts]
+
+        result = await db.execute(
+            select(EmbeddingCache.text_hash, EmbeddingCache.embedding).where(
+                EmbeddingCache.model == model,
+                EmbeddingCache.text_hash.in_(set(hashes)),
+            )
+        )
+        vectors = dict(result.all())
+
+        # Embed each unseen text once, even if it repeats in this batch
+        to_embed: dict = {}
+        for text_hash, chunk_text in zip(hashes, texts):
+            if text_hash not in vectors and text_hash not in to_embed:
+                to_embed[text_hash] = chunk_text
+
+        if to_embed:
+            new_embeddings = await embedding_service.embed_texts(
+                list(to_embed.values())
+            )
+            await db.execute(
+                pg_insert(EmbeddingCache)
+                .values([
+                    {"text_hash": text_hash, "model": model, "embedding": embedding}
+                    for text_hash, embedding in zip(to_embed, new_embeddings)
+                ])
+                .on_conflict_do_nothing()
             )
-            self.db.add(chunk_embedding)
+            vectors.update(zip(to_embed, new_embeddings))
+
+        return [vectors[text_hash] for text_hash in hashes]
+
+    async def _bulk_copy(self, db: AsyncSession, chunk_rows: list, embedding_rows: list):
+        """COPY chunk and embedding rows through the asyncpg connection.
+
+        Runs inside the session's open transaction (the raw connection is
+        the one the session is bound to), so the job-status commit in
+        run_job still covers it atomically.
+        """
+        sa_conn = await db.connection()
+        raw = await sa_conn.get_raw_connection()
+        conn = raw.driver_connection
+        # Teach asyncpg the halfvec binary format (accepts numpy rows)
+        await register_vector(conn)
+        await conn.copy_records_to_table(
+            "chunks", records=chunk_rows, columns=_CHUNK_COPY_COLUMNS
+        )
+        await conn.copy_records_to_table(
+            "chunk_embeddings", records=embedding_rows, columns=_EMBEDDING_COPY_COLUMNS
+        )
 
-    async def _update_job_stage(self, job: IngestionJob, stage: JobStage):
+    async def _update_job_stage(self, db: AsyncSession, job: IngestionJob, stage: JobStage):
         """Update the job stage."""
         job.stage = stage
         job.updated_at = datetime.now(timezone.utc)
-        await self.db.flush()
+        await db.flush()
 
-    async def get_job_status(self, job_id: UUID) -> Optional[IngestionJob]:
+    async def get_job_status(self, db: AsyncSession, job_id: UUID) -> Optional[IngestionJob]:
         """Get the status of an ingestion job."""
-        result = await self.db.execute(
+        result = await db.execute(
             select(IngestionJob).where(IngestionJob.id == job_id)
         )
         return result.scalar_one_or_none()
+
+
+# Shared app-scoped instance; endpoints pass their request session in
+pipeline = IngestionPipeline()
+
+
+async def run_ingestion_job(
+    job_id: UUID,
+    file_path: Optional[str] = None,
+    cleanup_file: bool = False,
+):
+    """Background-task entry point for running a queued ingestion job.
+
+    Opens its own session — the request's session is closed by the time
+    FastAPI background tasks run.
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            await pipeline.run_job(session, job_id, file_path=file_path)
+    finally:
+        if cleanup_file and file_path and os.path.exists(file_path):
+            os.remove(file_path)
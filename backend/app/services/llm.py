@@ -1,74 +1,82 @@
+import asyncio
+import re
 from typing import List, AsyncGenerator, Optional
 
-from openai import AsyncOpenAI
+import orjson
 
 from app.config import settings
 from app.models.schemas import RetrievedChunk, Citation
+from app.services.openai_client import shared_async_openai, shared_http_client
+from app.services.retrieval import fmt_ymd_hm
+
+# [Source N] references the model was instructed to emit; used to build
+# citations only for sources the answer actually cites
+_SOURCE_REF_RE = re.compile(r"\[Source (\d+)\]")
 
 
 class LLMService:
     """Service for LLM-based answer generation using OpenAI GPT."""
 
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        # Shared client with the tuned HTTP/2 transport — a default
+        # AsyncOpenAI's connection limits throttle fan-out workloads
+        # like generate_answers_batch
+        self.client = shared_async_openai
         self.model = settings.llm_model
 
-    def _build_context(self, chunks: List[RetrievedChunk]) -> str:
-        """Build context string from retrieved chunks."""
-        context_parts = []
+    @staticmethod
+    def _page_part(chunk: RetrievedChunk) -> str:
+        if not chunk.page_start:
+            return ""
+        if chunk.page_end and chunk.page_end != chunk.page_start:
+            return f", Page {chunk.page_start}-{chunk.page_end}"
+        return f", Page {chunk.page_start}"
 
-        for i, chunk in enumerate(chunks, 1):
-            # Build source reference
-            source_info = f"[Source {i}: {chunk.document_title}"
-            if chunk.page_start:
-                source_info += f", Page {chunk.page_start}"
-                if chunk.page_end and chunk.page_end != chunk.page_start:
-                    source_info += f"-{chunk.page_end}"
-            if chunk.time_start:
-                source_info += f", Time: {chunk.time_start.strftime('%Y-%m-%d %H:%M')}"
-            source_info += "]"
+    @staticmethod
+    def _time_part(chunk: RetrievedChunk) -> str:
+        if not chunk.time_start:
+            return ""
+        return f", Time: {fmt_ymd_hm(chunk.time_start)}"
 
-            context_parts.append(f"{source_info}\n{chunk.text}")
+    def _build_context(self, chunks: List[RetrievedChunk]) -> str:
+        """Build context string from retrieved chunks.
 
-        return "\n\n---\n\n".join(context_parts)
+        Each source header is assembled in one f-string (the helpers
+        return "" for absent parts) and join consumes a generator, so
+        no intermediate list or incrementally re-concatenated strings
+        are allocated per chunk.
+        """
+        return "\n\n---\n\n".join(
+            f"[Source {i}: {chunk.document_title}"
+            f"{self._page_part(chunk)}{self._time_part(chunk)}]"
+            f"\n{chunk.text}"
+            for i, chunk in enumerate(chunks, 1)
+        )
 
     def _build_citations(self, chunks: List[RetrievedChunk]) -> List[Citation]:
-        """Build citation objects from chunks."""
-        citations = []
-
-        for chunk in chunks:
-            # Build page range string
-            page_range = None
-            if chunk.page_start:
-                page_range = str(chunk.page_start)
-                if chunk.page_end and chunk.page_end != chunk.page_start:
-                    page_range += f"-{chunk.page_end}"
-
-            # Build time range string
-            time_range = None
-            if chunk.time_start:
-                time_range = chunk.time_start.strftime("%Y-%m-%d %H:%M")
-                if chunk.time_end and chunk.time_end != chunk.time_start:
-                    time_range += f" - {chunk.time_end.strftime('%H:%M')}"
-
-            citations.append(Citation(
+        """Build citation objects from chunks.
+
+        The snippet and range strings were precomputed when the chunks
+        came out of retrieval, so this is a straight field mapping.
+        """
+        return [
+            Citation(
                 chunk_id=chunk.chunk_id,
                 document_id=chunk.document_id,
                 title=chunk.document_title,
                 source_uri=chunk.source_uri,
                 source_type=chunk.source_type,
-                page_range=page_range,
-                time_range=time_range,
-                text_snippet=chunk.text[:200] + "..." if len(chunk.text) > 200 else chunk.text,
-            ))
-
-        return citations
-
-    def _build_messages(
-        self, query: str, context: str, conversation_history: Optional[List[dict]] = None
-    ) -> List[dict]:
-        """Build the messages array for OpenAI chat completion."""
-        system_message = """You are a helpful AI assistant that answers questions based on the user's personal knowledge base.
+                page_range=chunk.page_range,
+                time_range=chunk.time_range,
+                text_snippet=chunk.snippet,
+            )
+            for chunk in chunks
+        ]
+
+    # Static system prompt. Kept byte-identical across turns so provider
+    # prompt caching (OpenAI automatic prefix caching) can reuse the
+    # prefill KV-cache for the system + history prefix.
+    SYSTEM_MESSAGE = """You are a helpful AI assistant that answers questions based on the user's personal knowledge base.
 
 IMPORTANT RULES:
 1. Only answer based on the provided context. Do not make up information.
@@ -78,9 +86,21 @@ IMPORTANT RULES:
 5. If the question is about something that happened at a specific time, mention the relevant dates/times from the sources.
 6. Synthesize information from multiple sources when relevant."""
 
-        messages = [{"role": "system", "content": system_message}]
+    def build_cacheable_messages(
+        self, query: str, context: str, conversation_history: Optional[List[dict]] = None
+    ) -> List[dict]:
+        """Build the messages array for OpenAI chat completion.
+
+        Ordered for prompt caching: the static system prompt and the
+        conversation history form a stable prefix that is identical to
+        the previous turn's prompt, so the provider only pays prefill
+        cost for the trailing retrieval block and question. Retrieved
+        chunks are therefore NOT interpolated into the system prompt or
+        the history — they live in their own trailing user message.
+        """
+        messages = [{"role": "system", "content": self.SYSTEM_MESSAGE}]
 
-        # Add conversation history if present
+        # Stable history prefix
         if conversation_history:
             for msg in conversation_history[-6:]:  # Last 3 exchanges
                 messages.append({
@@ -88,15 +108,18 @@ IMPORTANT RULES:
                     "content": msg["content"]
                 })
 
-        # Add current query with context
-        user_message = f"""Based on the following context from my knowledge base, please answer my question.
-
-CONTEXT:
-{context}
+        # Dynamic retrieval block: changes every turn, so it goes after
+        # the cacheable prefix
+        messages.append({
+            "role": "user",
+            "content": f"Context from my knowledge base:\n\n{context}",
+        })
 
-QUESTION: {query}"""
-
-        messages.append({"role": "user", "content": user_message})
+        # Current question last
+        messages.append({
+            "role": "user",
+            "content": f"Based on the context above, please answer my question.\n\nQUESTION: {query}",
+        })
 
         return messages
 
@@ -121,8 +144,7 @@ QUESTION: {query}"""
             return "I don't have any information about that in my knowledge base.", []
 
         context = self._build_context(chunks)
-        citations = self._build_citations(chunks)
-        messages = self._build_messages(query, context, conversation_history)
+        messages = self.build_cacheable_messages(query, context, conversation_history)
 
         response = await self.client.chat.completions.create(
             model=self.model,
@@ -132,8 +154,32 @@ QUESTION: {query}"""
         )
 
         answer = response.choices[0].message.content
+
+        # Build citations only for the sources the answer actually
+        # references — the model usually cites a handful of the top_k
+        # chunks, and uncited ones don't need snippet/range formatting
+        used = sorted({int(n) for n in _SOURCE_REF_RE.findall(answer or "")})
+        cited = [chunks[n - 1] for n in used if 1 <= n <= len(chunks)]
+        citations = self._build_citations(cited)
         return answer, citations
 
+    async def generate_answers_batch(
+        self,
+        items: List[tuple],
+    ) -> List[tuple[str, List[Citation]]]:
+        """
+        Generate answers for several queries concurrently.
+
+        Each item is a (query, chunks, conversation_history) tuple as
+        accepted by generate_answer. The completions are issued together
+        so their network latency overlaps instead of adding up — useful
+        for evaluation and reranking passes that grade many candidates.
+        """
+        return await asyncio.gather(*[
+            self.generate_answer(query, chunks, history)
+            for query, chunks, history in items
+        ])
+
     async def generate_answer_stream(
         self,
         query: str,
@@ -151,19 +197,49 @@ QUESTION: {query}"""
             return
 
         context = self._build_context(chunks)
-        messages = self._build_messages(query, context, conversation_history)
+        messages = self.build_cacheable_messages(query, context, conversation_history)
 
-        stream = await self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            max_tokens=2048,
-            temperature=0.7,
-            stream=True,
-        )
+        async for token in self._raw_stream(messages):
+            yield token
+
+    async def _raw_stream(self, messages: List[dict]) -> AsyncGenerator[str, None]:
+        """Stream completion tokens over raw SSE.
 
-        async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        The SDK validates every event into a ChatCompletionChunk model
+        before the one content field is read; at streaming token rates
+        that per-event Pydantic cost dominates. Parsing the data: lines
+        with orjson on the shared HTTP/2 pool keeps just the work that
+        matters per token.
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": 2048,
+            "temperature": 0.7,
+            "stream": True,
+        }
+        headers = {
+            "Authorization": f"Bearer {settings.openai_api_key}",
+            "Content-Type": "application/json",
+        }
+        async with shared_http_client.stream(
+            "POST",
+            "https://api.openai.com/v1/chat/completions",
+            content=orjson.dumps(payload),
+            headers=headers,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[6:]
+                if data == "[DONE]":
+                    break
+                choices = orjson.loads(data)["choices"]
+                if choices:
+                    content = choices[0]["delta"].get("content")
+                    if content:
+                        yield content
 
     def get_citations_for_chunks(self, chunks: List[RetrievedChunk]) -> List[Citation]:
         """Get citations without generating an answer."""
@@ -0,0 +1,22 @@
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+# One AsyncOpenAI client for the whole process. Per-service clients each
+# carry their own httpx pool (default 100 connections / 20 keepalive);
+# sharing a single HTTP/2 client multiplexes embed + transcribe calls
+# over the same TLS connections, cutting handshakes and FD usage during
+# ingestion bursts.
+# Exported separately so hot paths (e.g. SSE streaming) can hit the API
+# over the same pool without the SDK's per-event parsing
+shared_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=256, max_keepalive_connections=64),
+    timeout=httpx.Timeout(60.0, connect=5.0),
+)
+
+shared_async_openai = AsyncOpenAI(
+    api_key=settings.openai_api_key,
+    http_client=shared_http_client,
+)
@@ -0,0 +1,176 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from app.models.schemas import Citation
+
+
+class _SemanticBucket:
+    """Per-conversation semantic entries with a lazily stacked matrix.
+
+    Embeddings are L2-normalized float32 rows, so a lookup is one
+    matrix-vector product against the stacked matrix instead of a
+    Python-level cosine per entry. Entries are append-ordered with a
+    constant TTL, so expired entries always form a prefix.
+    """
+
+    __slots__ = ("expires", "meta", "vecs", "matrix")
+
+    def __init__(self):
+        self.expires: List[float] = []
+        self.meta: List[tuple] = []  # (answer, citations)
+        self.vecs: List[np.ndarray] = []
+        self.matrix: Optional[np.ndarray] = None
+
+    def append(self, expires_at: float, answer, citations, vec: np.ndarray):
+        self.expires.append(expires_at)
+        self.meta.append((answer, citations))
+        self.vecs.append(vec)
+        self.matrix = None
+
+    def pop_oldest(self):
+        del self.expires[0], self.meta[0], self.vecs[0]
+        self.matrix = None
+
+    def prune(self, now: float):
+        i = 0
+        while i < len(self.expires) and self.expires[i] <= now:
+            i += 1
+        if i:
+            del self.expires[:i], self.meta[:i], self.vecs[:i]
+            self.matrix = None
+
+    def best_match(self, query_vec: np.ndarray) -> Tuple[int, float]:
+        if self.matrix is None:
+            self.matrix = np.vstack(self.vecs)
+        sims = self.matrix @ query_vec
+        best = int(np.argmax(sims))
+        return best, float(sims[best])
+
+
+class ResponseCache:
+    """Two-tier in-process cache for chat responses.
+
+    Tier 1 is an exact-match lookup keyed by a hash of (user_id,
+    conversation_id, message). Tier 2 falls back to cosine similarity
+    over recently cached query embeddings, returning a cached answer
+    when a near-identical question was asked before. Hits skip
+    retrieval and the LLM call entirely.
+
+    Both tiers are scoped to the conversation: answers depend on the
+    conversation history, so a hit from one conversation must not be
+    replayed in another where the history differs.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300.0,
+        similarity_threshold: float = 0.97,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # Tier 1: exact key -> (expires_at, answer, citations)
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        # Tier 2: (user_id, conversation_id) -> _SemanticBucket
+        self._buckets: dict = {}
+
+    @staticmethod
+    def _exact_key(user_id: UUID, conversation_id: Optional[UUID], message: str) -> str:
+        return hashlib.sha256(
+            f"{user_id}|{conversation_id}|{message}".encode()
+        ).hexdigest()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if not norm:
+            return None
+        return vec / norm
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [k for k, v in self._entries.items() if v[0] <= now]
+        for key in expired:
+            del self._entries[key]
+        for key, bucket in list(self._buckets.items()):
+            bucket.prune(now)
+            if not bucket.expires:
+                del self._buckets[key]
+
+    def lookup_exact(
+        self, user_id: UUID, conversation_id: Optional[UUID], message: str
+    ) -> Optional[Tuple[str, List[Citation]]]:
+        """Tier-1 lookup: exact (user, conversation, message) match."""
+        self._evict_expired()
+        key = self._exact_key(user_id, conversation_id, message)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        _, answer, citations = entry
+        return answer, citations
+
+    def lookup_semantic(
+        self,
+        user_id: UUID,
+        conversation_id: Optional[UUID],
+        query_embedding: List[float],
+    ) -> Optional[Tuple[str, List[Citation]]]:
+        """Tier-2 lookup: cosine similarity against cached query embeddings."""
+        self._evict_expired()
+        bucket = self._buckets.get((user_id, conversation_id))
+        if bucket is None:
+            return None
+        query_vec = self._normalize(query_embedding)
+        if query_vec is None:
+            return None
+        best, similarity = bucket.best_match(query_vec)
+        if similarity >= self.similarity_threshold:
+            answer, citations = bucket.meta[best]
+            return answer, citations
+        return None
+
+    def put(
+        self,
+        user_id: UUID,
+        conversation_id: Optional[UUID],
+        message: str,
+        query_embedding: Optional[List[float]],
+        answer: str,
+        citations: List[Citation],
+    ):
+        """Store a response under both the exact key and its embedding."""
+        expires_at = time.monotonic() + self.ttl_seconds
+        exact = self._exact_key(user_id, conversation_id, message)
+        self._entries[exact] = (expires_at, answer, citations)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        if query_embedding is None:
+            return
+        vec = self._normalize(query_embedding)
+        if vec is None:
+            return
+        bucket = self._buckets.setdefault(
+            (user_id, conversation_id), _SemanticBucket()
+        )
+        bucket.append(expires_at, answer, citations, vec)
+        # Entries share a constant TTL, so each bucket's head is its
+        # oldest entry — evict from the globally oldest head
+        while sum(len(b.expires) for b in self._buckets.values()) > self.max_entries:
+            oldest_key = min(self._buckets, key=lambda k: self._buckets[k].expires[0])
+            oldest = self._buckets[oldest_key]
+            oldest.pop_oldest()
+            if not oldest.expires:
+                del self._buckets[oldest_key]
+
+
+# Singleton instance
+response_cache = ResponseCache()
@@ -3,18 +3,103 @@ from datetime import datetime, timedelta
 from typing import Optional, List, Tuple
 from uuid import UUID
 
-from sqlalchemy import select, func, text, or_, and_
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from pgvector.sqlalchemy import Vector
 
-from app.models.models import Chunk, ChunkEmbedding, Document
+from app.config import settings
+from app.models.models import SourceType
 from app.models.schemas import RetrievedChunk
 from app.services.embeddings import embedding_service
 
+# Word tokens for tsquery construction: joining raw query.split() with
+# " & " hands tsquery syntax characters (&, |, !, :, quotes) straight
+# to the server-side parser, which rejects them
+_TSQUERY_TOKEN_RE = re.compile(r"\w+")
+
+
+def fmt_ymd_hm(dt: datetime) -> str:
+    """'%Y-%m-%d %H:%M' via f-string — strftime routes every call
+    through locale-aware C formatting that this fixed layout never
+    needs, and this runs per chunk per request."""
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}"
+
+
+def fmt_hm(dt: datetime) -> str:
+    """'%H:%M' via f-string; see fmt_ymd_hm."""
+    return f"{dt.hour:02d}:{dt.minute:02d}"
+
+
+# Range formatters keyed by (has_start, end_present_and_differs): one
+# dict lookup per chunk replaces the nested branches
+_PAGE_FMT = {
+    (True, True): lambda s, e: f"{s}-{e}",
+    (True, False): lambda s, e: str(s),
+    (False, True): lambda s, e: None,
+    (False, False): lambda s, e: None,
+}
+_TIME_FMT = {
+    (True, True): lambda s, e: f"{fmt_ymd_hm(s)} - {fmt_hm(e)}",
+    (True, False): lambda s, e: fmt_ymd_hm(s),
+    (False, True): lambda s, e: None,
+    (False, False): lambda s, e: None,
+}
+
+
+def _citation_strings(row) -> Tuple[str, Optional[str], Optional[str]]:
+    """Precompute a result row's citation display strings.
+
+    Done once here so citation builds downstream are straight field
+    mapping instead of re-slicing and re-formatting per call.
+    """
+    snippet = row.text[:200] + "..." if len(row.text) > 200 else row.text
+
+    page_range = _PAGE_FMT[
+        bool(row.page_start),
+        bool(row.page_end and row.page_end != row.page_start),
+    ](row.page_start, row.page_end)
+
+    time_range = _TIME_FMT[
+        bool(row.time_start),
+        bool(row.time_end and row.time_end != row.time_start),
+    ](row.time_start, row.time_end)
+
+    return snippet, page_range, time_range
+
 
 class TemporalParser:
     """Parse temporal expressions from queries."""
 
+    # All temporal expressions as one alternation, compiled at import:
+    # a single scan of the query instead of one search per expression,
+    # with the engine sharing prefix work between the "last ..."
+    # alternatives. Inner groups (weekday, day count, month) carry the
+    # captured value; dispatch is on which outer named group matched.
+    _TEMPORAL_RE = re.compile(
+        r"\blast\s+(?:"
+        r"(?P<last_wd>monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+        r"|(?P<last_week>week)"
+        r"|(?P<last_month>month)"
+        r"|(?P<last_days>\d+)\s+days?"
+        r")\b"
+        r"|\b(?P<yesterday>yesterday)\b"
+        r"|\bin\s+(?P<in_month>january|february|march|april|may|june|july"
+        r"|august|september|october|november|december)\b"
+        r"|\bthis\s+(?P<this_week>week)\b"
+        r"|\b(?P<today>today)\b",
+        re.IGNORECASE,
+    )
+
+    _HANDLERS = {
+        "last_wd": lambda m, ref: TemporalParser._get_last_weekday(m.group("last_wd"), ref),
+        "last_week": lambda m, ref: (ref - timedelta(days=7), ref),
+        "last_month": lambda m, ref: (ref - timedelta(days=30), ref),
+        "last_days": lambda m, ref: (ref - timedelta(days=int(m.group("last_days"))), ref),
+        "yesterday": lambda m, ref: (ref - timedelta(days=1), ref),
+        "in_month": lambda m, ref: TemporalParser._get_month_range(m.group("in_month"), ref),
+        "this_week": lambda m, ref: (ref - timedelta(days=ref.weekday()), ref),
+        "today": lambda m, ref: (ref.replace(hour=0, minute=0, second=0), ref),
+    }
+
     @staticmethod
     def parse_time_expression(
         query: str,
@@ -30,40 +115,13 @@ class TemporalParser:
         if reference_time is None:
             reference_time = datetime.utcnow()
 
-        patterns = [
-            # "last Tuesday", "last Monday", etc.
-            (r"\blast\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
-             lambda m: TemporalParser._get_last_weekday(m.group(1), reference_time)),
-            # "yesterday"
-            (r"\byesterday\b",
-             lambda m: (reference_time - timedelta(days=1), reference_time)),
-            # "last week"
-            (r"\blast\s+week\b",
-             lambda m: (reference_time - timedelta(days=7), reference_time)),
-            # "last month"
-            (r"\blast\s+month\b",
-             lambda m: (reference_time - timedelta(days=30), reference_time)),
-            # "last N days"
-            (r"\blast\s+(\d+)\s+days?\b",
-             lambda m: (reference_time - timedelta(days=int(m.group(1))), reference_time)),
-            # "in November", "in January", etc.
-            (r"\bin\s+(january|february|march|april|may|june|july|august|september|october|november|december)\b",
-             lambda m: TemporalParser._get_month_range(m.group(1), reference_time)),
-            # "this week"
-            (r"\bthis\s+week\b",
-             lambda m: (reference_time - timedelta(days=reference_time.weekday()), reference_time)),
-            # "today"
-            (r"\btoday\b",
-             lambda m: (reference_time.replace(hour=0, minute=0, second=0), reference_time)),
-        ]
-
-        for pattern, handler in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                time_range = handler(match)
-                if time_range:
-                    cleaned_query = re.sub(pattern, "", query, flags=re.IGNORECASE).strip()
-                    return cleaned_query, time_range[0], time_range[1]
+        match = TemporalParser._TEMPORAL_RE.search(query)
+        if match:
+            handler = TemporalParser._HANDLERS[match.lastgroup]
+            time_range = handler(match, reference_time)
+            if time_range:
+                cleaned_query = (query[:match.start()] + query[match.end():]).strip()
+                return cleaned_query, time_range[0], time_range[1]
 
         return query, None, None
 
@@ -118,6 +176,10 @@ class TemporalParser:
 class RetrievalService:
     """Hybrid retrieval service combining vector and full-text search."""
 
+    # RRF smoothing constant; 60 is the standard value from the original
+    # TREC work and keeps low ranks from dominating the fused score
+    RRF_K = 60
+
     def __init__(self, db: AsyncSession):
         self.db = db
         self.temporal_parser = TemporalParser()
@@ -145,212 +207,191 @@ class RetrievalService:
         Returns:
             List of RetrievedChunk objects
         """
+        chunks, _ = await self.retrieve_with_embedding(
+            user_id, query, timezone, top_k, vector_weight, text_weight
+        )
+        return chunks
+
+    async def retrieve_with_embedding(
+        self,
+        user_id: UUID,
+        query: str,
+        timezone: str = "UTC",
+        top_k: int = 10,
+        vector_weight: float = 0.7,
+        text_weight: float = 0.3,
+    ) -> Tuple[List[RetrievedChunk], List[float]]:
+        """
+        Like retrieve(), but also returns the query embedding so callers
+        (e.g. the response cache) can reuse it without re-embedding.
+        """
         # Parse temporal expressions
         cleaned_query, time_start, time_end = self.temporal_parser.parse_time_expression(
             query, timezone
         )
 
-        # Get query embedding
         query_embedding = await embedding_service.embed_text(cleaned_query)
 
-        # Perform vector search
-        vector_results = await self._vector_search(
-            user_id, query_embedding, top_k * 3, time_start, time_end
-        )
-
-        # Perform full-text search
-        text_results = await self._fulltext_search(
-            user_id, cleaned_query, top_k * 3, time_start, time_end
+        # Both candidate scans, rank fusion and the final top_k all run
+        # in one SQL statement — one round trip instead of two queries
+        # plus a Python merge
+        chunks = await self._hybrid_search(
+            user_id, query_embedding, cleaned_query, top_k,
+            vector_weight, text_weight, time_start, time_end,
         )
 
-        # Merge and rerank results
-        merged = self._merge_results(
-            vector_results, text_results,
-            vector_weight, text_weight
-        )
+        return chunks, query_embedding
 
-        # Return top_k
-        return merged[:top_k]
+    # Temporal predicate shared by both candidate CTEs: chunks with a
+    # time range must overlap the query range; chunks without one fall
+    # back to their document's created_at
+    _TEMPORAL_SQL = (
+        " AND ((c.time_start IS NOT NULL"
+        " AND c.time_start <= :time_end AND c.time_end >= :time_start)"
+        " OR (c.time_start IS NULL"
+        " AND d.created_at >= :time_start AND d.created_at <= :time_end))"
+    )
 
-    async def _vector_search(
+    async def _hybrid_search(
         self,
         user_id: UUID,
         query_embedding: List[float],
-        limit: int,
-        time_start: Optional[datetime] = None,
-        time_end: Optional[datetime] = None,
-    ) -> List[Tuple[RetrievedChunk, float]]:
-        """Perform vector similarity search."""
-        # Build the query
-        query = (
-            select(
-                Chunk,
-                Document,
-                ChunkEmbedding.embedding.cosine_distance(query_embedding).label("distance")
-            )
-            .join(ChunkEmbedding, Chunk.id == ChunkEmbedding.chunk_id)
-            .join(Document, Chunk.document_id == Document.id)
-            .where(Chunk.user_id == user_id)
-        )
-
-        # Add temporal filter
-        if time_start and time_end:
-            query = query.where(
-                or_(
-                    # Chunks with time range overlapping query range
-                    and_(
-                        Chunk.time_start.isnot(None),
-                        Chunk.time_start <= time_end,
-                        Chunk.time_end >= time_start
-                    ),
-                    # Chunks without time range, use document created_at
-                    and_(
-                        Chunk.time_start.is_(None),
-                        Document.created_at >= time_start,
-                        Document.created_at <= time_end
-                    )
-                )
-            )
-
-        query = query.order_by("distance").limit(limit)
-
-        result = await self.db.execute(query)
-        rows = result.all()
-
-        chunks = []
-        for chunk, doc, distance in rows:
-            # Convert distance to similarity score (1 - distance for cosine)
-            score = 1 - distance
-
-            retrieved = RetrievedChunk(
-                chunk_id=chunk.id,
-                document_id=doc.id,
-                document_title=doc.title,
-                source_uri=doc.source_uri,
-                source_type=doc.source_type,
-                text=chunk.text,
-                score=score,
-                page_start=chunk.page_start,
-                page_end=chunk.page_end,
-                time_start=chunk.time_start,
-                time_end=chunk.time_end,
-            )
-            chunks.append((retrieved, score))
-
-        return chunks
-
-    async def _fulltext_search(
-        self,
-        user_id: UUID,
         query: str,
-        limit: int,
+        top_k: int,
+        vector_weight: float,
+        text_weight: float,
         time_start: Optional[datetime] = None,
         time_end: Optional[datetime] = None,
-    ) -> List[Tuple[RetrievedChunk, float]]:
-        """Perform full-text search using PostgreSQL tsvector."""
-        # Prepare the search query for tsquery
-        search_terms = " & ".join(query.split())
-
-        # Build the query using ts_rank
-        stmt = (
-            select(
-                Chunk,
-                Document,
-                func.ts_rank(Chunk.tsv, func.to_tsquery("english", search_terms)).label("rank")
-            )
-            .join(Document, Chunk.document_id == Document.id)
-            .where(Chunk.user_id == user_id)
-            .where(Chunk.tsv.op("@@")(func.to_tsquery("english", search_terms)))
+    ) -> List[RetrievedChunk]:
+        """Run vector and full-text candidate scans, RRF fusion and the
+        final top_k selection in a single SQL statement.
+
+        One round trip replaces two queries plus a Python-side merge:
+        each CTE ranks its own candidates (the HNSW scan and the GIN
+        tsquery scan), a FULL OUTER JOIN fuses the two rankings with
+        weight / (RRF_K + rank), and Postgres returns only the fused
+        top_k rows with their chunk and document columns. The tsquery
+        is parsed once per text-search config present in the user's
+        corpus (usually just one) and joined laterally, so the query is
+        lexed with the same config each chunk's tsv was generated with
+        — parsing with a fixed 'english' config would stem the query
+        differently from non-English tsvs and miss their entries.
+        """
+        # Raise the HNSW beam width for this transaction only —
+        # pgvector's default (40) costs recall and can make the planner
+        # skip the index entirely. SET LOCAL reverts at commit. The
+        # configured value is a floor; large top_k scales the beam so
+        # the scan can actually surface pool candidates (ef_search
+        # caps how many rows an HNSW scan returns).
+        ef_search = max(int(settings.hnsw_ef_search), top_k * 4)
+        await self.db.execute(
+            text(f"SET LOCAL hnsw.ef_search = {ef_search}")
         )
 
-        # Add temporal filter
+        # Keep only word tokens so the tsquery always parses — the old
+        # raw join meant punctuation cost a failed round trip before
+        # the retry. A NULL tsquery makes the full-text CTE yield no
+        # rows, so temporal-only or empty queries degrade to
+        # vector-only search.
+        search_terms = " & ".join(_TSQUERY_TOKEN_RE.findall(query)) or None
+
+        temporal = ""
+        params = {
+            "uid": user_id,
+            # pgvector's text input format; the cast to halfvec happens
+            # once, on the parameter, not per row
+            "qvec": "[" + ",".join(map(str, query_embedding)) + "]",
+            "tsq": search_terms,
+            "pool": top_k * 3,
+            "top_k": top_k,
+            "vw": float(vector_weight),
+            "tw": float(text_weight),
+            "rrf_k": self.RRF_K,
+        }
         if time_start and time_end:
-            stmt = stmt.where(
-                or_(
-                    and_(
-                        Chunk.time_start.isnot(None),
-                        Chunk.time_start <= time_end,
-                        Chunk.time_end >= time_start
-                    ),
-                    and_(
-                        Chunk.time_start.is_(None),
-                        Document.created_at >= time_start,
-                        Document.created_at <= time_end
-                    )
-                )
+            temporal = self._TEMPORAL_SQL
+            params["time_start"] = time_start
+            params["time_end"] = time_end
+
+        # documents is only pulled into the candidate scans when the
+        # temporal fallback predicate needs created_at
+        doc_join = " JOIN documents d ON d.id = c.document_id" if temporal else ""
+
+        sql = f"""
+            WITH v AS (
+                SELECT c.id AS chunk_id,
+                       row_number() OVER (
+                           ORDER BY e.embedding <=> (:qvec)::halfvec
+                       ) AS rnk
+                FROM chunks c
+                JOIN chunk_embeddings e
+                  ON e.chunk_id = c.id
+                 AND e.user_id = :uid{doc_join}
+                WHERE c.user_id = :uid{temporal}
+                ORDER BY e.embedding <=> (:qvec)::halfvec
+                LIMIT :pool
+            ), f AS (
+                SELECT c.id AS chunk_id,
+                       row_number() OVER (
+                           ORDER BY ts_rank(c.tsv, q.tsq) DESC
+                       ) AS rnk
+                FROM (SELECT DISTINCT language
+                      FROM chunks WHERE user_id = :uid) lang
+                CROSS JOIN LATERAL
+                     to_tsquery(lang.language::regconfig, :tsq) AS q(tsq)
+                JOIN chunks c
+                  ON c.user_id = :uid
+                 AND c.language = lang.language{doc_join}
+                WHERE c.tsv @@ q.tsq{temporal}
+                ORDER BY ts_rank(c.tsv, q.tsq) DESC
+                LIMIT :pool
+            ), fused AS (
+                SELECT COALESCE(v.chunk_id, f.chunk_id) AS chunk_id,
+                       COALESCE(:vw / (:rrf_k + v.rnk), 0)
+                       + COALESCE(:tw / (:rrf_k + f.rnk), 0) AS score
+                FROM v FULL OUTER JOIN f ON f.chunk_id = v.chunk_id
+                ORDER BY score DESC
+                LIMIT :top_k
             )
-
-        stmt = stmt.order_by(text("rank DESC")).limit(limit)
+            SELECT c.id, c.text, c.page_start, c.page_end,
+                   c.time_start, c.time_end,
+                   d.id AS document_id, d.title, d.source_uri, d.source_type,
+                   fused.score
+            FROM fused
+            JOIN chunks c ON c.id = fused.chunk_id AND c.user_id = :uid
+            JOIN documents d ON d.id = c.document_id
+            ORDER BY fused.score DESC
+        """
 
         try:
-            result = await self.db.execute(stmt)
-            rows = result.all()
+            result = await self.db.execute(text(sql), params)
         except Exception:
-            # If full-text search fails (e.g., invalid query), return empty
-            return []
-
-        chunks = []
-        for chunk, doc, rank in rows:
-            # Normalize rank to 0-1 range (ts_rank typically returns small values)
-            score = min(rank * 10, 1.0)  # Scale up but cap at 1
-
-            retrieved = RetrievedChunk(
-                chunk_id=chunk.id,
-                document_id=doc.id,
-                document_title=doc.title,
-                source_uri=doc.source_uri,
-                source_type=doc.source_type,
-                text=chunk.text,
-                score=score,
-                page_start=chunk.page_start,
-                page_end=chunk.page_end,
-                time_start=chunk.time_start,
-                time_end=chunk.time_end,
+            # to_tsquery chokes on punctuation-heavy input; retry
+            # vector-only rather than failing the request
+            await self.db.rollback()
+            await self.db.execute(
+                text(f"SET LOCAL hnsw.ef_search = {ef_search}")
             )
-            chunks.append((retrieved, score))
+            params["tsq"] = None
+            result = await self.db.execute(text(sql), params)
 
+        chunks = []
+        for row in result.all():
+            snippet, page_range, time_range = _citation_strings(row)
+            chunks.append(RetrievedChunk(
+                chunk_id=row.id,
+                document_id=row.document_id,
+                document_title=row.title,
+                source_uri=row.source_uri,
+                source_type=SourceType[row.source_type],
+                text=row.text,
+                score=row.score,
+                page_start=row.page_start,
+                page_end=row.page_end,
+                time_start=row.time_start,
+                time_end=row.time_end,
+                snippet=snippet,
+                page_range=page_range,
+                time_range=time_range,
+            ))
         return chunks
-
-    def _merge_results(
-        self,
-        vector_results: List[Tuple[RetrievedChunk, float]],
-        text_results: List[Tuple[RetrievedChunk, float]],
-        vector_weight: float,
-        text_weight: float,
-    ) -> List[RetrievedChunk]:
-        """Merge and rerank results from both search methods."""
-        # Create a dictionary to combine scores
-        chunk_scores: dict = {}
-
-        for chunk, score in vector_results:
-            chunk_scores[chunk.chunk_id] = {
-                "chunk": chunk,
-                "vector_score": score,
-                "text_score": 0.0,
-            }
-
-        for chunk, score in text_results:
-            if chunk.chunk_id in chunk_scores:
-                chunk_scores[chunk.chunk_id]["text_score"] = score
-            else:
-                chunk_scores[chunk.chunk_id] = {
-                    "chunk": chunk,
-                    "vector_score": 0.0,
-                    "text_score": score,
-                }
-
-        # Calculate combined scores
-        results = []
-        for data in chunk_scores.values():
-            combined_score = (
-                data["vector_score"] * vector_weight +
-                data["text_score"] * text_weight
-            )
-            chunk = data["chunk"]
-            chunk.score = combined_score
-            results.append(chunk)
-
-        # Sort by combined score
-        results.sort(key=lambda x: x.score, reverse=True)
-
-        return results